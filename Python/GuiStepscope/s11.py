@@ -29,7 +29,6 @@
 # DEALINGS IN THE SOFTWARE.
 # ================================================================================
 import datetime
-import math
 import os
 import numpy
 from PyQt5 import QtWidgets
@@ -244,11 +243,8 @@ class S11(Tdr):
         if (flag & 0x2) == 0:
             return
 
-        # Fetch X-axis mapping
-        offsetGHz = Connect.getDevice().S11.Cfg.getOffsetGHz()
-        spanGHz = Connect.getDevice().S11.Cfg.getSpanGHz()
+        # FFT length for the meta-data (the frequency axis comes with the traces)
         fftlength = Connect.getDevice().S11.Cfg.getReclen()
-        # print("offsetGHz =", offsetGHz, ", spanGHz =", spanGHz, ", fftlength =", fftlength)
 
         # Fetch important settings
         persist = Connect.getDevice().S11.Cfg.getPersist()
@@ -264,25 +260,19 @@ class S11(Tdr):
 
         # print("persist =", persist, ", applySmoothing =", applySmoothing, ", avg =", avg)
 
-        # Fetch trace data
-        data_y = Connect.getDevice().S11.getBinaryMagn()
-        data_incident = Connect.getDevice().S11.getBinaryIncident()
-        data_reflected = Connect.getDevice().S11.getBinaryReflected()
-        # print("Length of fetched data:")
-        # print("  data_y: ", len(data_y))
-        # print("  data_incident: ", len(data_incident))
-        # print("  data_reflected: ", len(data_reflected))
+        # Fetch trace data, all from the same acquisition
+        traces = Connect.getDevice().S11.GetTraces(("Magn", "Incident", "Reflected"))
+        # print("Length of fetched data:", {name: len(values) for name, values in traces.items()})
 
+        def toDB(values):
+            # non-positive magnitudes are shown as 0 dB
+            return numpy.where(values > 0.0, 20.0 * numpy.log10(numpy.where(values > 0.0, values, 1.0)), 0.0)
+
+        data_x = traces["FrequencyGHz"]
+        data_y = toDB(traces["Magn"])
+        data_incident = toDB(traces["Incident"])
+        data_reflected = toDB(traces["Reflected"])
         reclen = len(data_y)
-        data_x = numpy.empty(reclen, float)
-
-        for index in range(reclen):
-            ghz = offsetGHz + (index * spanGHz) / fftlength
-            ohm = data_y[index]
-            data_x[index] = ghz
-            data_y[index] = 0.0 if data_y[index] <= 0.0 else (20.0 * math.log10(data_y[index]))
-            data_incident[index] = 0.0 if data_incident[index] <= 0.0 else (20.0 * math.log10(data_incident[index]))
-            data_reflected[index] = 0.0 if data_reflected[index] <= 0.0 else (20.0 * math.log10(data_reflected[index]))
 
         # Assign results into Gui widgets
 
@@ -31,7 +31,6 @@
 import datetime
 import math
 import os
-import numpy
 from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import QVBoxLayout, QApplication, QMainWindow
 
@@ -41,9 +40,13 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from popup import Popup
 from connect import Connect
 from settings import Settings
+from tdranalytics import TdrTrace
 
 
 class Tdr(Settings):
+    # Set True to add the detected discontinuities to the saved log as DISC rows (changes the file format)
+    TDRLogDiscontinuities = False
+
     def __init__(self, mainWindow: QMainWindow):
         super().__init__(mainWindow)
         # print("Tdr::__init__()")
@@ -324,45 +327,19 @@ class Tdr(Settings):
                 break
             pass
 
-        # Fetch trace data data_y, calculate min, max, average
-        data_y = Connect.getDevice().Tdr.getBinary()
+        # Fetch trace data data_y, calculate min, max, average between the cursors
+        trace = TdrTrace(Connect.getDevice().Tdr.getBinary(), offsetPS, spanPS, reclen)
+        data_x = trace.x
+        data_y = trace.y
 
         SENTINEL = 999999.999
-        minimum = SENTINEL
-        maximum = -SENTINEL
-
-        accum = 0.0
-        count = 0
-        data_x = numpy.empty(len(data_y), float)
-
-        for index in range(reclen):
-            ps = offsetPS + (index * spanPS) / reclen
-            ohm = data_y[index]
-            data_x[index] = ps
-
-            if x1 <= ps <= x2:
-                if ohm < minimum:
-                    minimum = ohm
-                if ohm > maximum:
-                    maximum = ohm
-                accum = accum + ohm
-                count = count + 1
-                pass
-            pass
-        # print("TDR count =", count, "minimum =", minimum, "maximum =", maximum, "accum =", accum)
-
-        # Duplicate values in second array for area between two cursors
-        selected_x = numpy.empty(count, float)
-        selected_y = numpy.empty(count, float)
-        selected_count = 0
-
-        for index in range(reclen):
-            if x1 <= data_x[index] <= x2:
-                selected_x[selected_count] = data_x[index]
-                selected_y[selected_count] = data_y[index]
-                selected_count = selected_count + 1
-                pass
-            pass
+        selected = trace.window(x1, x2)
+        selected_x = selected.x
+        selected_y = selected.y
+        count = selected.count
+        minimum = SENTINEL if count == 0 else selected.minimum
+        maximum = -SENTINEL if count == 0 else selected.maximum
+        # print("TDR count =", count, "minimum =", minimum, "maximum =", maximum, "average =", selected.average)
 
         # Assign results into Gui widgets
         self.editTDRShortCalib.setText(shortCalDateTime)
@@ -376,7 +353,7 @@ class Tdr(Settings):
                    "Selected region:\n" + \
                    " min " + ("n/a" if minimum == SENTINEL else "{:.2f} ohm".format(minimum)) + "\n" + \
                    " max " + ("n/a" if maximum == -SENTINEL else "{:.2f} ohm".format(maximum)) + "\n" + \
-                   " avg " + ("n/a" if count == 0 else "{:.2f} ohm".format(accum / count)) + "\n" + \
+                   " avg " + ("n/a" if count == 0 else "{:.2f} ohm".format(selected.average)) + "\n" + \
                    " (" + ("{:.0f} samples".format(count)) + ")"
 
         # Build chart for screen display
@@ -462,31 +439,24 @@ class Tdr(Settings):
 
             average_number = -1.0
             if count > 0:
-                average_number = accum / count
+                average_number = selected.average
 
             self.TDRLogFileContents = self.TDRLogFileContents + \
                                       '"' + results_str + "\"," + date_str + "," + time_str + ", " + \
                                       "SELAVG" + "," + "-1" + "," + "-1" + "," + "{:.2f}".format(average_number) + "\n"
 
-            for index in range(reclen):
-                index_str = "{:.0f}".format(index)
-                x_value_str = "{:.3f}".format(offsetPS + (index * spanPS) / reclen)
-                y_value_str = "{:.2f}".format(data_y[index])
-
-                self.TDRLogFileContents = self.TDRLogFileContents + \
-                                          '"' + results_str + "\"," + date_str + "," + time_str + ", " + \
-                                          "TDR" + "," + index_str + "," + x_value_str + "," + y_value_str + "\n"
-                pass
-
-            for index in range(len(selected_y)):
-                index_str = "{:.0f}".format(index)
-                x_value_str = "{:.3f}".format(selected_x[index])
-                y_value_str = "{:.2f}".format(selected_y[index])
-
-                self.TDRLogFileContents = self.TDRLogFileContents + \
-                                          '"' + results_str + "\"," + date_str + "," + time_str + ", " + \
-                                          "SELTDR" + "," + index_str + "," + x_value_str + "," + y_value_str + "\n"
-                pass
+            # one joined string, so long records do not rebuild the log once per sample
+            prefix = '"' + results_str + "\"," + date_str + "," + time_str + ", "
+            self.TDRLogFileContents = self.TDRLogFileContents + "".join(
+                [prefix + "TDR," + "{:.0f},{:.3f},{:.2f}".format(index, x, y) + "\n"
+                 for index, (x, y) in enumerate(zip(data_x.tolist(), data_y.tolist()))] +
+                [prefix + "SELTDR," + "{:.0f},{:.3f},{:.2f}".format(index, x, y) + "\n"
+                 for index, (x, y) in enumerate(zip(selected_x.tolist(), selected_y.tolist()))])
+
+            if self.TDRLogDiscontinuities:
+                self.TDRLogFileContents = self.TDRLogFileContents + "".join(
+                    [prefix + "DISC," + "{:.0f},{:.3f},{:.2f}".format(disc["Index"], disc["PS"], disc["StepOhm"]) + "\n"
+                     for disc in trace.findDiscontinuities()])
 
         except Exception as e:
             print("Problem building pivot file contents: ", e)
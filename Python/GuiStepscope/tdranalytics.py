@@ -0,0 +1,119 @@
+# tdranalytics.py
+# ================================================================================
+# BOOST SOFTWARE LICENSE
+#
+# Copyright 2020 BitWise Laboratories Inc.
+# Original Author.......Jim Waschura
+# Contact...............info@bitwiselabs.com
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# obtaining a copy of the software and accompanying documentation covered by
+# this license (the "Software") to use, reproduce, display, distribute,
+# execute, and transmit the Software, and to prepare derivative works of the
+# Software, and to permit third-parties to whom the Software is furnished to
+# do so, all subject to the following:
+#
+# The copyright notices in the Software and this entire statement, including
+# the above license grant, this restriction and the following disclaimer,
+# must be included in all copies of the Software, in whole or in part, and
+# all derivative works of the Software, unless such copies or derivative
+# works are solely in the form of machine-executable object code generated by
+# a source language processor.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE, TITLE AND NON-INFRINGEMENT. IN NO EVENT
+# SHALL THE COPYRIGHT HOLDERS OR ANYONE DISTRIBUTING THE SOFTWARE BE LIABLE
+# FOR ANY DAMAGES OR OTHER LIABILITY, WHETHER IN CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+# ================================================================================
+import numpy
+
+
+class TdrWindow:
+    """Samples of a TDR trace between two cursors, with their statistics (None when empty)."""
+
+    def __init__(self, x: numpy.ndarray, y: numpy.ndarray):
+        self.x = x
+        self.y = y
+        self.count = len(y)
+        self.minimum = float(y.min()) if self.count > 0 else None
+        self.maximum = float(y.max()) if self.count > 0 else None
+        self.average = float(y.mean()) if self.count > 0 else None
+
+
+class TdrTrace:
+    """
+    Impedance profile of one TDR record: ohm values with their time axis in ps.  Built from
+    Tdr.getBinary() and the Tdr.Cfg offset, span and record length, so it works the same from the
+    GUI or a script.
+    """
+
+    def __init__(self, dataY, offsetPS: float, spanPS: float, reclen: int = None):
+        self.y = numpy.asarray(dataY, dtype=float)
+        self.offsetPS = float(offsetPS)
+        self.spanPS = float(spanPS)
+        self.reclen = len(self.y) if reclen is None else int(reclen)
+        if self.reclen <= 0:
+            raise Exception("[Invalid_Record_Length]")
+        self.x = TdrTrace.axis(self.offsetPS, self.spanPS, self.reclen, len(self.y))
+
+    @staticmethod
+    def axis(offsetPS: float, spanPS: float, reclen: int, count: int = None) -> numpy.ndarray:
+        """Sample times in ps: offset + index * span / reclen."""
+        return offsetPS + numpy.arange(reclen if count is None else count) * (spanPS / reclen)
+
+    @staticmethod
+    def fetch(device) -> "TdrTrace":
+        """Read the current TDR record from a connected StepscopeDevice."""
+        offsetPS = device.Tdr.Cfg.getOffsetPS()
+        spanPS = device.Tdr.Cfg.getSpanPS()
+        reclen = device.Tdr.Cfg.getReclen()
+        return TdrTrace(device.Tdr.getBinary(), offsetPS, spanPS, reclen)
+
+    def window(self, x1: float, x2: float) -> TdrWindow:
+        """Samples with x1 <= ps <= x2 (cursors in either order)."""
+        if x1 > x2:
+            x1, x2 = x2, x1
+        mask = (self.x >= x1) & (self.x <= x2)
+        return TdrWindow(self.x[mask], self.y[mask])
+
+    def findDiscontinuities(self, thresholdOhm: float = 2.0, windowPS: float = None, windowSamples: int = 8) -> list:
+        """
+        Places where the impedance steps by at least `thresholdOhm`, comparing the average of
+        the samples just before and just after each point (`windowPS`, or `windowSamples`
+        samples, each side).  Neighbouring points over the threshold count as one discontinuity,
+        reported at its largest step as a dict of Index, PS, BeforeOhm, AfterOhm and StepOhm.
+        """
+        if windowPS is not None:
+            windowSamples = int(round(windowPS * self.reclen / self.spanPS)) if self.spanPS > 0 else 1
+        n = max(1, int(windowSamples))
+        if len(self.y) < 2 * n:
+            return []
+
+        # moving averages of n samples from cumulative sums; before[k] ends at k, after[k] starts at k+1
+        sums = numpy.concatenate(([0.0], numpy.cumsum(self.y)))
+        means = (sums[n:] - sums[:-n]) / n
+        before = means[:-n]
+        after = means[n:]
+        step = after - before
+        index = numpy.arange(len(step)) + n - 1
+
+        over = numpy.abs(step) >= thresholdOhm
+        if not over.any():
+            return []
+
+        # contiguous runs of points over the threshold, and the largest step in each
+        edges = numpy.diff(numpy.concatenate(([0], over.astype(numpy.int8), [0])))
+        starts = numpy.flatnonzero(edges == 1)
+        ends = numpy.flatnonzero(edges == -1)
+        peaks = numpy.array([start + numpy.argmax(numpy.abs(step[start:end])) for start, end in zip(starts, ends)])
+
+        return [{"Index": int(index[k]),
+                 "PS": float(self.x[index[k]]) + 0.5 * self.spanPS / self.reclen,
+                 "BeforeOhm": float(before[k]),
+                 "AfterOhm": float(after[k]),
+                 "StepOhm": float(step[k])} for k in peaks]
+
+# EOF
@@ -0,0 +1,69 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class AcquisitionPipeline:
+    """
+    Hands acquired data from the acquisition thread to analysis worker threads through a bounded
+    queue, so the instrument can be set up for the next point while the last one is analyzed.
+
+    submit(*args) queues a call of `analyze(*args)` and returns a Future for its result; it blocks
+    only while `max_pending` items are already waiting.  With one worker (the default) items are
+    analyzed in the order submitted.
+    """
+
+    def __init__(self, analyze, workers=1, max_pending=4):
+        if workers < 1 or max_pending < 1:
+            raise ValueError("workers and max_pending must be at least 1")
+        self._analyze = analyze
+        self._queue = queue.Queue(max_pending)
+        self._threads = [threading.Thread(target=self._work, name=f"analysis-{n}", daemon=True)
+                         for n in range(workers)]
+        self._closed = False
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                future, args = item
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(self._analyze(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    @property
+    def pending(self):
+        """Items waiting for a worker."""
+        return self._queue.qsize()
+
+    def submit(self, *args) -> Future:
+        if self._closed:
+            raise RuntimeError("Pipeline is closed")
+        future = Future()
+        self._queue.put((future, args))
+        return future
+
+    def close(self):
+        """Finish everything queued, then stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
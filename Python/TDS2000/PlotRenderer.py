@@ -0,0 +1,144 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy
+
+
+# seconds to wait for all worker processes to start
+WORKER_START_TIMEOUT = 60.0
+
+_started = None
+
+
+def _init_worker(started=None):
+    global _started
+    _started = started
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _warm_up():
+    """Hold this worker until every worker runs a warm-up, so the pool must start all of them."""
+    _started.wait(WORKER_START_TIMEOUT)
+
+
+def _render(file_name, x, y, plot):
+    """Draw one waveform chart and save it; runs in a worker process."""
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(x, y, color='blue', linewidth=2, label='Waveform')
+    for mx, my in plot.get("markers", ()):
+        ax.scatter([mx], [my], s=80, color='red', marker='o')
+    for x0, x1, level in plot.get("levels", ()):
+        ax.plot([x0, x1], [level, level], color='red', linewidth=2)
+    ax.set_xlabel(plot.get("x_label", ""))
+    ax.set_ylabel(plot.get("y_label", ""))
+    ax.set_title(plot.get("title", ""))
+    fig.suptitle(plot.get("suptitle", ""))
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(file_name, dpi=plot.get("dpi", 300))
+    return file_name
+
+
+class PlotRenderer:
+    """
+    Renders waveform charts to image files in worker processes (Agg backend), so a sweep does not
+    wait for matplotlib.  At most `max_pending` charts are queued or rendering; submit() blocks
+    when the queue is full.  The image format follows the file name extension.
+
+    Workers are forked, because the sweep scripts run at module level and must not be re-imported;
+    where fork is unavailable a thread pool is used instead.  All workers are forked here, so
+    create the renderer before starting any other threads (forking a multithreaded process can
+    leave the child blocked on a lock another thread held).
+    """
+
+    def __init__(self, workers=2, max_pending=8, dpi=300):
+        if workers < 1 or max_pending < 1:
+            raise ValueError("workers and max_pending must be at least 1")
+        self._dpi = dpi
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._failed = {}
+        self._written = []
+        self._progress = False
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            self._pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                             initargs=(context.Barrier(workers),))
+            # before Python 3.11 workers start on demand, only while none is idle; warm-ups that
+            # wait for each other keep every worker busy, so all are forked now, not mid-sweep
+            for future in [self._pool.submit(_warm_up) for _ in range(workers)]:
+                future.result()
+        else:
+            _init_worker()
+            self._pool = ThreadPoolExecutor(workers)
+
+    @property
+    def progress(self):
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: bool):
+        self._progress = bool(value)
+
+    def _progress_print(self, msg):
+        if self.progress:
+            print("[PROGRESS]", msg)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def submit(self, file_name, waveform, title="", suptitle="", markers=(), levels=()):
+        """
+        Queue a chart of `waveform` with optional (x, y) `markers` and (x0, x1, y) horizontal
+        `levels`.  The samples are copied, so the waveform may be reused straight away.
+        """
+        plot = {
+            "title": title,
+            "suptitle": suptitle,
+            "x_label": "Time (" + waveform.x_units + ")",
+            "y_label": "Voltage (" + waveform.y_units + ")",
+            "markers": [(float(x), float(y)) for x, y in markers],
+            "levels": [(float(x0), float(x1), float(y)) for x0, x1, y in levels],
+            "dpi": self._dpi,
+        }
+        x = numpy.array(waveform.generate_x_values())
+        y = numpy.array(waveform.y_values)
+
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(_render, file_name, x, y, plot)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._done(file_name, f))
+
+    def _done(self, file_name, future):
+        self._slots.release()
+        error = future.exception()
+        with self._lock:
+            if error is None:
+                self._written.append(file_name)
+            else:
+                self._failed[file_name] = str(error)
+        if error is None:
+            self._progress_print(f"Wrote chart {file_name}")
+        else:
+            print(f"Chart {file_name} failed: {error}")
+
+    def close(self):
+        """Wait for queued charts; returns {"Written": [...], "Failed": {file_name: message}}."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._lock:
+            return {"Written": list(self._written), "Failed": dict(self._failed)}
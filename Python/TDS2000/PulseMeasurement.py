@@ -0,0 +1,168 @@
+import numpy
+
+from TDS2000.Waveform import Waveform
+
+# Result keys, named like the instrument's Step PulseStats report ("RiseTransitionPS=...") so the
+# two can be compared directly.  Levels are in the waveform's y units (mV here), times in ps.
+PULSE_KEYS = ("BaseMV", "TopMV", "AmplitudeMV", "RiseTransitionPS", "FallTransitionPS", "WidthPS",
+              "OvershootPct", "UndershootPct")
+
+HISTOGRAM_BINS = 100
+
+
+def _histogram_levels(y):
+    """
+    Per-row base and top: the most populated histogram bins below and above the mid level, each
+    refined to the mean of the samples in it.  Flat rows get base == top.
+    """
+    rows = y.shape[0]
+    low = y.min(axis=1, keepdims=True)
+    high = y.max(axis=1, keepdims=True)
+    height = numpy.where(high > low, high - low, 1.0)
+
+    index = numpy.minimum(((y - low) / height * HISTOGRAM_BINS).astype(numpy.int64), HISTOGRAM_BINS - 1)
+    index += numpy.arange(rows)[:, None] * HISTOGRAM_BINS
+    size = rows * HISTOGRAM_BINS
+    counts = numpy.bincount(index.ravel(), minlength=size).reshape(rows, HISTOGRAM_BINS)
+    sums = numpy.bincount(index.ravel(), weights=y.ravel(), minlength=size).reshape(rows, HISTOGRAM_BINS)
+
+    half = HISTOGRAM_BINS // 2
+    row = numpy.arange(rows)
+    levels = []
+    for chosen in (numpy.argmax(counts[:, :half], axis=1), half + numpy.argmax(counts[:, half:], axis=1)):
+        n = counts[row, chosen]
+        center = low[:, 0] + (chosen + 0.5) * height[:, 0] / HISTOGRAM_BINS
+        level = numpy.where(n > 0, sums[row, chosen] / numpy.maximum(n, 1), center)
+        levels.append(numpy.where(high[:, 0] > low[:, 0], level, low[:, 0]))
+    return levels[0], levels[1]
+
+
+def _crossings(y, threshold, rising):
+    """Boolean (rows, n-1) array marking the segments k..k+1 that cross each row's threshold."""
+    t = threshold[:, None]
+    left = y[:, :-1]
+    right = y[:, 1:]
+    if rising:
+        return (left < t) & (right >= t)
+    return (left > t) & (right <= t)
+
+
+def _first_after(mask, start):
+    """Index of the first marked segment at or after `start` per row, -1 if none."""
+    column = numpy.arange(mask.shape[1])
+    candidates = numpy.where(mask & (column >= start[:, None]), column, mask.shape[1])
+    first = candidates.min(axis=1)
+    return numpy.where(first < mask.shape[1], first, -1)
+
+
+def _last_before(mask, end):
+    """Index of the last marked segment at or before `end` per row, -1 if none."""
+    column = numpy.arange(mask.shape[1])
+    return numpy.where(mask & (column <= end[:, None]), column, -1).max(axis=1)
+
+
+def _position(y, segment, threshold):
+    """Fractional sample index where each row crosses its threshold within `segment`; NaN if none."""
+    rows = numpy.arange(y.shape[0])
+    k = numpy.maximum(segment, 0)
+    left = y[rows, k]
+    right = y[rows, numpy.minimum(k + 1, y.shape[1] - 1)]
+    step = right - left
+    fraction = numpy.where(step != 0, (threshold - left) / numpy.where(step != 0, step, 1.0), 0.0)
+    return numpy.where(segment >= 0, k + fraction, numpy.nan)
+
+
+def measure_pulses(y, dx, x_to_ps=1000.0, levels="histogram") -> dict:
+    """
+    Pulse parameters for every row of `y` (one positive pulse per row, sample interval `dx`):
+    base/top levels, amplitude, 10-90% rise and 90-10% fall transition, 50% width, and overshoot
+    (above top) and undershoot (below base) as a percentage of amplitude.
+
+    `x_to_ps` converts `dx` units to ps (default: x in ns).  `levels` is "histogram" (most common
+    level below/above the mid level) or "minmax".  Returns a dict of arrays keyed by PULSE_KEYS;
+    values that cannot be found for a row are NaN.
+    """
+    y = numpy.atleast_2d(numpy.asarray(y, dtype=float))
+    if y.shape[1] < 2:
+        raise ValueError("Pulses need at least two samples")
+
+    if levels == "histogram":
+        base, top = _histogram_levels(y)
+    elif levels == "minmax":
+        base, top = y.min(axis=1), y.max(axis=1)
+    else:
+        raise ValueError('levels must be "histogram" or "minmax"')
+
+    amplitude = top - base
+    t10 = base + 0.1 * amplitude
+    t50 = base + 0.5 * amplitude
+    t90 = base + 0.9 * amplitude
+    none = numpy.full(y.shape[0], -1)
+
+    # first 50% rising edge, then the 50% falling edge after it
+    rise50 = _first_after(_crossings(y, t50, True), numpy.zeros(y.shape[0], dtype=int))
+    fall50 = numpy.where(rise50 >= 0, _first_after(_crossings(y, t50, False), rise50 + 1), -1)
+
+    # 10% and 90% crossings belonging to those edges
+    rise10 = numpy.where(rise50 >= 0, _last_before(_crossings(y, t10, True), rise50), none)
+    rise90 = numpy.where(rise50 >= 0, _first_after(_crossings(y, t90, True), rise50), none)
+    fall90 = numpy.where(fall50 >= 0, _last_before(_crossings(y, t90, False), fall50), none)
+    fall10 = numpy.where(fall50 >= 0, _first_after(_crossings(y, t10, False), fall50), none)
+
+    scale = dx * x_to_ps
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        valid = amplitude > 0
+        answer = {
+            "BaseMV": base,
+            "TopMV": top,
+            "AmplitudeMV": amplitude,
+            "RiseTransitionPS": (_position(y, rise90, t90) - _position(y, rise10, t10)) * scale,
+            "FallTransitionPS": (_position(y, fall10, t10) - _position(y, fall90, t90)) * scale,
+            "WidthPS": (_position(y, fall50, t50) - _position(y, rise50, t50)) * scale,
+            "OvershootPct": numpy.where(valid, (y.max(axis=1) - top) / amplitude * 100.0, numpy.nan),
+            "UndershootPct": numpy.where(valid, (base - y.min(axis=1)) / amplitude * 100.0, numpy.nan),
+        }
+    return answer
+
+
+def measure_waveforms(waveforms, x_to_ps=1000.0, levels="histogram") -> dict:
+    """measure_pulses() for a list of Waveforms with the same sample count and span."""
+    if len(waveforms) == 0:
+        raise ValueError("No waveforms to measure")
+    count = waveforms[0].count
+    span = waveforms[0].span
+    if any(wf.count != count or wf.span != span for wf in waveforms):
+        raise ValueError("Waveforms must have the same sample count and span")
+    if count < 2:
+        raise ValueError("Waveforms need at least two samples")
+
+    stack = numpy.stack([wf.y_values for wf in waveforms])
+    return measure_pulses(stack, span / (count - 1), x_to_ps, levels)
+
+
+def measure_waveform(waveform: Waveform, x_to_ps=1000.0, levels="histogram") -> dict:
+    """Pulse parameters of one Waveform, as floats."""
+    results = measure_waveforms([waveform], x_to_ps, levels)
+    return {key: float(values[0]) for key, values in results.items()}
+
+
+def format_pulse_stats(results: dict, row=0) -> str:
+    """One row of results as "Key=value" lines, the same layout as Step PulseStats()."""
+    lines = []
+    for key in PULSE_KEYS:
+        value = numpy.atleast_1d(results[key])[row]
+        lines.append(f"{key}={value:.6g}")
+    return "\n".join(lines)
+
+
+def parse_pulse_stats(text: str) -> dict:
+    """Parse Key=value lines (e.g. from Step PulseStats()) into floats; non-numeric values stay text."""
+    answer = {}
+    for line in text.splitlines():
+        if "=" in line:
+            key, value = line.split("=", 1)
+            try:
+                answer[key.strip()] = float(value)
+            except ValueError:
+                answer[key.strip()] = value.strip()
+    return answer
@@ -3,6 +3,13 @@ import time
 from TDS2000.Waveform import Waveform
 from pyBitwiseAutomation import StepscopeDevice, BranchStep, BranchStepCfg
 
+# per-step limits for auto_alignment, in seconds
+STOP_TIMEOUT = 10.0
+ALIGN_START_TIMEOUT = 10.0
+ALIGN_TIMEOUT = 15.0
+# Fit that starts no run within this (the pause it used to get) is finished
+FIT_START_TIMEOUT = 1.0
+
 
 class SSDevice(StepscopeDevice):
     """
@@ -71,18 +78,39 @@ class SSDevice(StepscopeDevice):
         self.Step.Cfg.setAvg(5)
         self.WaitForRunToComplete()
 
-    def auto_alignment(self):
+    def auto_alignment(self, timeout=None):
+        """
+        Align and fit the pulse, returning as soon as the instrument reports each step done
+        instead of after fixed pauses.  `timeout` (seconds) bounds the whole operation; by
+        default only the per-step limits apply.
+        """
         self._progress_print("Align and center single pulse")
         if self.timing:
             start = time.perf_counter()
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        def limit(step_timeout):
+            if deadline is None:
+                return step_timeout
+            return min(step_timeout, deadline - time.perf_counter())
+
+        stopped = lambda: self.Step.getRunning() == BranchStep.Running.Stop
+
         self.App.Stop()
+        self.Step.WaitForState(stopped, limit(STOP_TIMEOUT), "Stopping")
         self.Announce.Clear()
-        time.sleep(2)
-        self.Step.Align(BranchStep.AlignMode.align0101)
-        time.sleep(4)
+        self.Step.Align(BranchStep.AlignMode.align0101, waitToComplete=True,
+                        waitUntilAligningTimeout=limit(ALIGN_START_TIMEOUT),
+                        waitToCompleteTimeout=limit(ALIGN_TIMEOUT))
+        # Fit returns at once; when it re-acquires at the fitted span, let that acquisition finish
+        sequence = self.Step.getSequence()
         self.Step.Fit()
-        time.sleep(1)
+        started = lambda: self.Step.getRunning() != BranchStep.Running.Stop or self.Step.getSequence() != sequence
+        if self.Step.WaitForState(started, limit(FIT_START_TIMEOUT), "Fitting", required=False):
+            self.Step.WaitForState(lambda: self.Step.getSequence() != sequence or stopped(),
+                                   limit(ALIGN_TIMEOUT), "Fitting")
         self.App.Stop()
+        self.Step.WaitForState(stopped, limit(STOP_TIMEOUT), "Stopping")
 
         if self.timing:
             elapsed = time.perf_counter() - start
@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import Future, wait
+
+
+class SweepCoordinator:
+    """
+    Runs each instrument's part of a sweep on its own worker thread, so the instruments work
+    at the same time instead of one after the other.
+
+    `sides` maps a name to a function `side(point, index, sync)` called once per point, in order.
+    `sync` is a barrier shared by all sides: each side calls sync.wait() at the same steps of a
+    point (e.g. "pulse is set" and "waveform is captured"), and no side passes a step until all
+    have reached it.  Every side must call it the same number of times per point.  Between those
+    steps a side may run ahead into the next point, e.g. the pulser can be set up for the next
+    point while the scope is still reading out the last one.
+
+    run(points) yields (point, {name: result}) in order as soon as every side has finished the
+    point, so results can be analyzed while the instruments move on.  If a side fails, the
+    barrier is broken so the others stop, and the exception is raised from run().
+    """
+
+    def __init__(self, sides: dict, timeout=None):
+        if not sides:
+            raise ValueError("At least one side is needed")
+        self._sides = dict(sides)
+        self._timeout = timeout
+        self._timing = False
+        self._progress = False
+
+    @property
+    def timing(self):
+        return self._timing
+
+    @timing.setter
+    def timing(self, value: bool):
+        self._timing = bool(value)
+
+    @property
+    def progress(self):
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: bool):
+        self._progress = bool(value)
+
+    def _progress_print(self, msg):
+        if self.progress:
+            print("[PROGRESS]", msg)
+
+    def run(self, points):
+        points = list(points)
+        sync = threading.Barrier(len(self._sides), timeout=self._timeout)
+        stop = threading.Event()
+        futures = [{name: Future() for name in self._sides} for _ in points]
+
+        def work(name, side):
+            for index, point in enumerate(points):
+                future = futures[index][name]
+                if stop.is_set() or not future.set_running_or_notify_cancel():
+                    break
+                try:
+                    if self.timing:
+                        start = time.perf_counter()
+                    future.set_result(side(point, index, sync))
+                    if self.timing:
+                        elapsed = time.perf_counter() - start
+                        print(f"[TIMING] {name} point {index + 1} took {elapsed:.3f} sec")
+                except BaseException as e:
+                    future.set_exception(e)
+                    stop.set()
+                    sync.abort()
+                    break
+            for remaining in futures:
+                remaining[name].cancel()
+
+        threads = [threading.Thread(target=work, args=(name, side), name=f"sweep-{name}", daemon=True)
+                   for name, side in self._sides.items()]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for index, point in enumerate(points):
+                wait(futures[index].values())
+                self._raise_failure(futures[index])
+                self._progress_print(f"Point {index + 1}-of-{len(points)} done by all sides")
+                yield point, {name: future.result() for name, future in futures[index].items()}
+        finally:
+            stop.set()
+            sync.abort()
+            for thread in threads:
+                thread.join()
+
+    @staticmethod
+    def _raise_failure(point_futures: dict):
+        """Raise the first real failure of a point, in preference to the broken barrier it caused."""
+        errors = [future.exception() for future in point_futures.values()
+                  if not future.cancelled() and future.exception() is not None]
+        for error in errors:
+            if not isinstance(error, threading.BrokenBarrierError):
+                raise error
+        if errors:
+            raise errors[0]
+        if any(future.cancelled() for future in point_futures.values()):
+            raise RuntimeError("Sweep stopped before the point was measured")
@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, wait
+from enum import Enum
+
+from TDS2000.Helper import SWEEP_ACCESSORY_PULSES, SWEEP_OTHER_PULSES, SWEEP_ACCESSORY_AMPLITUDES, \
+    SWEEP_OTHER_AMPLITUDES, consider_sweep_int_list
+from pyBitwiseAutomation import BranchPulse
+
+
+class SweepAxis:
+    """
+    One swept parameter.  `values` is a list, or a function of the point built so far (a dict of
+    the axes ordered before this one) returning a list, for axes whose values depend on another
+    setting.  `cost` is the relative price of changing the setting; `setter(value)` applies it.
+    """
+
+    def __init__(self, name: str, values, cost=1.0, setter=None):
+        self.name = name
+        self.values = values
+        self.cost = float(cost)
+        self.setter = setter
+
+    def values_for(self, point: dict) -> list:
+        return list(self.values(point) if callable(self.values) else self.values)
+
+
+def point_key(value) -> str:
+    """Stable text for a setting value, used to identify points in the checkpoint file."""
+    if isinstance(value, Enum):
+        return value.name
+    return str(value)
+
+
+class SweepExecutor:
+    """
+    Runs a measurement at every point of a sweep over several axes.
+
+    Points are ordered with the most expensive axes outermost (stable for equal cost, so callable
+    axes still follow the axes they depend on), and inner axes run in alternating direction so the
+    setting at each boundary is unchanged.  Setters are only called when their value changes.
+    With `checkpoint_file`, each completed point and its result is saved as it finishes, and a
+    later run with the same axes skips those points.  When every point is done the checkpoint is
+    renamed to `<checkpoint_file>.done`, so the next run starts a new sweep.
+    """
+
+    def __init__(self, axes, checkpoint_file=None):
+        self._axes = sorted(axes, key=lambda axis: -axis.cost)
+        self._checkpoint_file = checkpoint_file
+        self._done = {}
+        self._current = {}
+        self._progress = False
+        self._points = None
+        self._lock = threading.Lock()
+
+    @property
+    def progress(self):
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: bool):
+        self._progress = bool(value)
+
+    def _progress_print(self, msg):
+        if self.progress:
+            print("[PROGRESS]", msg)
+
+    @property
+    def axis_names(self):
+        return [axis.name for axis in self._axes]
+
+    def points(self) -> list:
+        """Every point as a dict of axis name to value, in run order."""
+        if self._points is None:
+            self._points = []
+            self._expand(0, {}, [False] * len(self._axes))
+        return list(self._points)
+
+    def _expand(self, depth, point, reverse):
+        if depth == len(self._axes):
+            self._points.append(dict(point))
+            return
+        values = self._axes[depth].values_for(point)
+        if reverse[depth]:
+            values.reverse()
+        for value in values:
+            point[self._axes[depth].name] = value
+            self._expand(depth + 1, point, reverse)
+            # the next value of this axis starts the deeper axes where they ended
+            for deeper in range(depth + 1, len(self._axes)):
+                reverse[deeper] = not reverse[deeper]
+        del point[self._axes[depth].name]
+
+    @property
+    def run_count(self):
+        return len(self.points())
+
+    def key(self, point: dict) -> str:
+        return "|".join(f"{name}={point_key(point[name])}" for name in sorted(self.axis_names))
+
+    def load_checkpoint(self) -> int:
+        """Read completed points from the checkpoint file; returns how many will be skipped."""
+        self._done = {}
+        if self._checkpoint_file is None or not os.path.exists(self._checkpoint_file):
+            return 0
+        with open(self._checkpoint_file, "r") as f:
+            saved = json.load(f)
+        if sorted(saved.get("Axes", [])) != sorted(self.axis_names):
+            print(f"Checkpoint {self._checkpoint_file} is for a different sweep, starting over")
+            return 0
+        keys = set(self.key(point) for point in self.points())
+        self._done = {key: result for key, result in saved.get("Done", {}).items() if key in keys}
+        return len(self._done)
+
+    def _save_checkpoint(self):
+        if self._checkpoint_file is None:
+            return
+        temp_name = self._checkpoint_file + ".part"
+        with open(temp_name, "w") as f:
+            json.dump({"Axes": self.axis_names, "Done": self._done}, f, indent=1)
+        os.replace(temp_name, self._checkpoint_file)
+
+    def _complete(self, key, result):
+        with self._lock:
+            self._done[key] = result
+            self._save_checkpoint()
+
+    def _future_done(self, key, future):
+        if not future.cancelled() and future.exception() is None:
+            self._complete(key, future.result())
+
+    def clear_checkpoint(self):
+        self._done = {}
+        if self._checkpoint_file is not None and os.path.exists(self._checkpoint_file):
+            os.remove(self._checkpoint_file)
+
+    def is_done(self, point: dict) -> bool:
+        return self.key(point) in self._done
+
+    def _apply(self, point: dict):
+        for axis in self._axes:
+            value = point[axis.name]
+            if axis.setter is not None and (axis.name not in self._current or self._current[axis.name] != value):
+                self._progress_print(f"Set {axis.name} to {point_key(value)}")
+                axis.setter(value)
+            self._current[axis.name] = value
+
+    def forget_settings(self):
+        """Make the next point apply every setter, e.g. after the instrument was reset."""
+        self._current = {}
+
+    def run(self, measure, resume=True):
+        """
+        Call `measure(point, index, count)` at every point not already done and checkpoint its
+        result, which must be JSON serializable.  An exception from `measure` stops the sweep
+        with the completed points saved, so it can be resumed.
+
+        `measure` may return a Future (e.g. from AcquisitionPipeline) so the next point starts
+        while this one is analyzed; its result is checkpointed when it arrives, and run() waits
+        for all of them before returning.  A failed Future leaves its point to be redone.
+        """
+        points = self.points()
+        if resume:
+            skipped = self.load_checkpoint()
+            if skipped:
+                print(f"Resuming sweep, {skipped}-of-{len(points)} points already done")
+        else:
+            self.clear_checkpoint()
+
+        pending = []
+        try:
+            for index, point in enumerate(points):
+                key = self.key(point)
+                if key in self._done:
+                    continue
+                self._apply(point)
+                result = measure(point, index, len(points))
+                if isinstance(result, Future):
+                    result.add_done_callback(lambda future, key=key: self._future_done(key, future))
+                    pending.append(result)
+                else:
+                    self._complete(key, result)
+        finally:
+            wait(pending)
+
+        for future in pending:
+            if not future.cancelled() and future.exception() is not None:
+                raise future.exception()
+
+        if all(self.is_done(point) for point in points):
+            self._retire_checkpoint()
+        return self.results()
+
+    def _retire_checkpoint(self):
+        if self._checkpoint_file is not None and os.path.exists(self._checkpoint_file):
+            os.replace(self._checkpoint_file, self._checkpoint_file + ".done")
+            self._progress_print(f"Sweep complete, checkpoint kept as {self._checkpoint_file}.done")
+
+    def results(self, nominal=False) -> list:
+        """
+        (point, result) for every completed point, in run order, or with `nominal` in the order of
+        each axis's value list (most expensive axis first), undoing the alternating directions.
+        """
+        points = self.points()
+        if nominal:
+            points.sort(key=self._nominal_key)
+        with self._lock:
+            return [(point, self._done[self.key(point)]) for point in points if self.key(point) in self._done]
+
+    def _nominal_key(self, point: dict):
+        return tuple(axis.values_for(point).index(point[axis.name]) for axis in self._axes)
+
+
+def pulser_sweep_axes(pulser_modes, ac_modes, dsp_modes, pulse_length_arg: str, amplitude_arg: str,
+                      set_pulser_mode=None, set_ac_mode=None, set_dsp_mode=None):
+    """
+    Axes of the STEPScope pulser sweep from the Helper.py lists: pulser mode (most expensive),
+    AC calibration mode, DSP mode, then pulse length and amplitude, whose value lists depend on
+    whether the pulser mode is Accessory.
+    """
+    def lengths(point):
+        using_accessory = point["pulser_mode"] == BranchPulse.Mode.Accessory
+        return consider_sweep_int_list("pulse length", pulse_length_arg, using_accessory,
+                                       SWEEP_ACCESSORY_PULSES, SWEEP_OTHER_PULSES)
+
+    def amplitudes(point):
+        using_accessory = point["pulser_mode"] == BranchPulse.Mode.Accessory
+        return consider_sweep_int_list("amplitude", amplitude_arg, using_accessory,
+                                       SWEEP_ACCESSORY_AMPLITUDES, SWEEP_OTHER_AMPLITUDES)
+
+    return [
+        SweepAxis("pulser_mode", pulser_modes, cost=100.0, setter=set_pulser_mode),
+        SweepAxis("ac_mode", ac_modes, cost=50.0, setter=set_ac_mode),
+        SweepAxis("dsp_mode", dsp_modes, cost=10.0, setter=set_dsp_mode),
+        SweepAxis("pulse_length", lengths, cost=1.0),
+        SweepAxis("amplitude", amplitudes, cost=1.0),
+    ]
@@ -7,10 +7,12 @@ import time
 import tkinter as tk
 from tkinter import filedialog
 
-import matplotlib.pyplot as plt
-
 from Helper import *
+from TDS2000.AcquisitionPipeline import AcquisitionPipeline
+from TDS2000.PlotRenderer import PlotRenderer
 from TDS2000.SSDevice import SSDevice
+from TDS2000.SweepExecutor import SweepExecutor, pulser_sweep_axes
+from TDS2000.SweepResults import SweepResultsStore
 from pyBitwiseAutomation import BranchCalib
 
 stepscope = SSDevice()
@@ -133,217 +135,205 @@ try:
     # ============
 
     date_time = time.strftime("%y%m%d_%H%M%S")
-    run_count = 0
-    run_progress = 0
-    good_count = 0
 
     # ========================================================================
 
-    for pulser_mode in pulser_mode_values_list:
-        for ac_mode in acmode_values_list:
-            for dsp_mode in dsp_values_list:
-                using_accessory_flag = bool(pulser_mode == stepscope.Pulse.Mode.Accessory)
-
-                pulse_lengths_w = consider_sweep_int_list("pulse length", pulse_length_value, using_accessory_flag,
-                                                          SWEEP_ACCESSORY_PULSES, SWEEP_OTHER_PULSES)
+    def set_pulser_mode(pulser_mode):
+        stepscope.Pulse.setMode(pulser_mode)
+        using_accessory_flag = bool(pulser_mode == stepscope.Pulse.Mode.Accessory)
+        stepscope.Acc.PUL.setNegEnabled(using_accessory_flag)
+        stepscope.Acc.PUL.setPosEnabled(using_accessory_flag)
+
+    def set_dsp_mode(dsp_mode):
+        if dsp_mode is None:
+            stepscope.Calib.setDSPEnabled(False)
+            stepscope.Step.Cfg.setDSPMode(BranchStepCfg.DSPMode.Differential)
+        else:
+            stepscope.Calib.setDSPEnabled(True)
+            stepscope.Step.Cfg.setDSPMode(dsp_mode)
+
+    def dsp_name(dsp_mode):
+        return "Uncalibrated" if dsp_mode is None else dsp_mode.name
+
+    def configuration_prefix(pulser_mode, ac_mode, dsp_mode):
+        return str(f'{results_path}{serial_number}_{pulser_mode.name}_{attenuator_value:.0f}dB_{dsp_name(dsp_mode)[:4]}_AC{ac_mode.name}')
+
+    # pulser mode and AC mode change least often; completed points are kept in the checkpoint
+    # file, so an interrupted sweep started again with the same arguments continues where it stopped
+    sweep = SweepExecutor(pulser_sweep_axes(pulser_mode_values_list, acmode_values_list, dsp_values_list,
+                                            pulse_length_value, amplitude_value,
+                                            set_pulser_mode=set_pulser_mode,
+                                            set_ac_mode=stepscope.Calib.setACMode,
+                                            set_dsp_mode=set_dsp_mode),
+                          checkpoint_file=f"{results_path}{serial_number}_{attenuator_value:.0f}dB_sweep.json")
+    sweep.progress = stepscope.progress
+    run_count = sweep.run_count
 
-                amplitudes_mv = consider_sweep_int_list("amplitude", amplitude_value, using_accessory_flag,
-                                                        SWEEP_ACCESSORY_AMPLITUDES, SWEEP_OTHER_AMPLITUDES)
+    stepscope.setup_channel()
+    # before any other threads are started: the renderer forks its worker processes here
+    renderer = PlotRenderer()
+    # every point of every run, for querying across sweeps; rows are written as they complete
+    store = SweepResultsStore(f"{results_path}sweep_results.bwsr", chunk_rows=1)
+
+    def measure_point(point, index, count):
+        pulser_mode = point["pulser_mode"]
+        ac_mode = point["ac_mode"]
+        dsp_mode_name = dsp_name(point["dsp_mode"])
+        pulse_length = point["pulse_length"]
+        amplitude = point["amplitude"]
+        using_accessory_flag = bool(pulser_mode == stepscope.Pulse.Mode.Accessory)
+
+        print(
+            f"Working on {index + 1}-of-{count}: Pulser {pulser_mode.name}, AC {ac_mode.name}, DSP {dsp_mode_name}, W{pulse_length:.0f}, {amplitude:.0f} mV")
+
+        for retry in range(2):
+            if using_accessory_flag:
+                stepscope.Pulse.setAccAmplMV(amplitude)
+                stepscope.Pulse.setAccWidth(map2accessoryLen(pulse_length))
+                time.sleep(0.5)
+            else:
+                stepscope.Pulse.setAmplMV(amplitude)
+                stepscope.Pulse.setLength(pulse_length)
+                time.sleep(0.5)
+
+            stepscope.auto_alignment()
+
+            expected = (pulse_length * 12.8) * 1.2
+            measured = stepscope.Step.Cfg.getSpanPS()
+
+            err = abs(expected-measured)
+            twenty_percent = expected * 0.20
+
+            if err<twenty_percent:
+                break
 
-                run_count += len(amplitudes_mv) * len(pulse_lengths_w)
+            print(f'Span expected {expected}, Measured {measured}')
+            print("Retry acquisition")
 
-    # ========================================================================
 
-    stepscope.setup_channel()
-    Error = False
+        waveform = stepscope.get_waveform_data(name="Step Response Pulse")
 
-    for pulser_mode in pulser_mode_values_list:
-        for ac_mode in acmode_values_list:
-            for dsp_mode in dsp_values_list:
-                stepscope.Pulse.setMode(pulser_mode)
-                stepscope.Calib.setACMode(ac_mode)
+        print( f"Acquire waveform for W={pulse_length:.0f}, {amplitude} mV, {waveform.count} samples")
 
-                if dsp_mode is None:
-                    stepscope.Calib.setDSPEnabled(False)
-                    stepscope.Step.Cfg.setDSPMode(BranchStepCfg.DSPMode.Differential)
-                else:
-                    stepscope.Calib.setDSPEnabled(True)
-                    stepscope.Step.Cfg.setDSPMode(dsp_mode)
+        # analyzed on the pipeline's worker thread while the next point is set up and aligned
+        return pipeline.submit(point, waveform)
 
-                using_accessory_flag = bool(pulser_mode == stepscope.Pulse.Mode.Accessory)
-                if using_accessory_flag:
-                    stepscope.Acc.PUL.setNegEnabled(True)
-                    stepscope.Acc.PUL.setPosEnabled(True)
-                else:
-                    stepscope.Acc.PUL.setNegEnabled(False)
-                    stepscope.Acc.PUL.setPosEnabled(False)
+    def analyze_point(point, waveform):
+        pulser_mode = point["pulser_mode"]
+        ac_mode = point["ac_mode"]
+        dsp_mode_name = dsp_name(point["dsp_mode"])
+        pulse_length = point["pulse_length"]
+        amplitude = point["amplitude"]
+        file_prefix = configuration_prefix(pulser_mode, ac_mode, point["dsp_mode"])
+        good = False
 
-                # ============
+        markers = []
+        title = ""
 
-                pulse_lengths_w = consider_sweep_int_list("pulse length", pulse_length_value, using_accessory_flag,
-                                                          SWEEP_ACCESSORY_PULSES, SWEEP_OTHER_PULSES)
+        try:
+            midlevel, minimum, maximum = waveform.get_mid_min_max()
+            print(f"Levels: vMin {minimum:.3f}, vMid {midlevel:.3f}, vMax {maximum:.3f}")
 
-                amplitudes_mv = consider_sweep_int_list("amplitude", amplitude_value, using_accessory_flag,
-                                                        SWEEP_ACCESSORY_AMPLITUDES, SWEEP_OTHER_AMPLITUDES)
+            # one percent, clamped 0.1 to 1.0 mV range
 
-                dsp_mode_name = "Uncalibrated"
-                if dsp_mode is not None:
-                    dsp_mode_name = dsp_mode.name
+            tolerance = max(0.1, min(1.0, abs(maximum - minimum) * 0.01))
 
-                file_prefix = str(
-                    f'{results_path}{serial_number}_{pulser_mode.name}_{attenuator_value:.0f}dB_{dsp_mode_name[:4]}_AC{ac_mode.name}')
-                csv_file_name = str(f'{file_prefix}.csv')
+            print(f"Tolerance is: {tolerance:.2f}")
 
-                results_ampl_setting = []
-                results_length_setting = []
-                results_ampl_measurement = []
+            falling = waveform.find_edge_crossing(midlevel, "falling", "last")
+            if falling is None:
+                raise Exception("[No_Falling_Edge_Found]")
 
-                try:
-                    for pulse_length in pulse_lengths_w:
-                        for amplitude in amplitudes_mv:
-                            run_progress += 1
+            falling_n = waveform.calc_index_of_x(falling)
+            falling_y = waveform.get_y_value(falling_n)
+            print(f"Falling edge: X={falling:.6f}, Y[{falling_n}]={falling_y:.6f}")
 
-                            print(
-                                f"Working on {run_progress}-of-{run_count}: Pulser {pulser_mode.name}, AC {ac_mode.name}, DSP {dsp_mode_name}, W{pulse_length:.0f}, {amplitude:.0f} mV")
+            rising = waveform.find_edge_crossing(midlevel, "rising", "last")
+            if rising is None:
+                raise Exception("[No_Rising_Edge_Found]")
 
-                            for retry in range(2):
-                                if using_accessory_flag:
-                                    stepscope.Pulse.setAccAmplMV(amplitude)
-                                    stepscope.Pulse.setAccWidth(map2accessoryLen(pulse_length))
-                                    time.sleep(0.5)
-                                else:
-                                    stepscope.Pulse.setAmplMV(amplitude)
-                                    stepscope.Pulse.setLength(pulse_length)
-                                    time.sleep(0.5)
+            rising_n = waveform.calc_index_of_x(rising)
+            rising_y = waveform.get_y_value(rising_n)
+            print(f"Rising edge: X={rising:.6f}, Y[{rising_n}]={rising_y:.6f}")
 
-                                amplitude_measurement = 0
-                                stepscope.auto_alignment()
+            high_flat = waveform.search_flat(falling_n, -1, args.flat, tolerance)
+            if high_flat is None:
+                raise Exception ("[High_Flat_Spot_Not_Found]")
 
-                                expected = (pulse_length * 12.8) * 1.2
-                                measured = stepscope.Step.Cfg.getSpanPS()
+            vhigh = waveform.get_y_value(high_flat)
+            xhigh = waveform.get_x_value(high_flat)
+            print(f"High n={high_flat:.0f}, X={xhigh:.6f}, Y={vhigh:.6f}")
+            markers.append((xhigh, vhigh))
 
-                                err = abs(expected-measured)
-                                twenty_percent = expected * 0.20
+            low_flat = waveform.search_flat(rising_n, -1, args.flat, tolerance)
+            if low_flat is None:
+                raise Exception( "[Low_Flat_Spot_Not_Found]")
 
-                                if err<twenty_percent:
-                                    break
+            vlow = waveform.get_y_value(low_flat)
+            xlow = waveform.get_x_value(low_flat)
+            print(f"Low n={low_flat:.1f}, X={xlow:.6f}, Y={vlow:.6f}")
+            markers.append((xlow, vlow))
 
-                                print(f'Span expected {expected}, Measured {measured}')
-                                print("Retry acquisition")
+            amplitude_measurement = float(vhigh - vlow)
+            print(f"Final amplitude is {amplitude_measurement:.3f}")
+            good = True
 
+            title = f"Amplitude {amplitude_measurement:.3f} {waveform.y_units}"
 
-                            waveform = stepscope.get_waveform_data(name="Step Response Pulse")
+        except Exception as e:
+            print(f"Exception encountered: {e}")
+            amplitude_measurement = float("nan")
+            title = f"Amplitude {amplitude_measurement:.3f} {waveform.y_units} {e}"
 
-                            print( f"Acquire waveform for W={pulse_length:.0f}, {amplitude} mV, {waveform.count} samples")
-
-                            try:
-                                if plt is not None:
-                                    plt.close()
-
-                                plt.figure()
-                                plt.plot(waveform.generate_x_values(), waveform.y_values, color='blue', linewidth=2,
-                                         label='Waveform')
-
-                                midlevel, minimum, maximum = waveform.get_mid_min_max()
-                                print(f"Levels: vMin {minimum:.3f}, vMid {midlevel:.3f}, vMax {maximum:.3f}")
-
-                                # one percent, clamped 0.1 to 1.0 mV range
-
-                                tolerance = max(0.1, min(1.0, abs(maximum - minimum) * 0.01))
-
-                                print(f"Tolerance is: {tolerance:.2f}")
-
-                                falling = waveform.find_edge_crossing(midlevel, "falling", "last")
-                                if falling is None:
-                                    raise Exception("[No_Falling_Edge_Found]")
-
-                                falling_n = waveform.calc_index_of_x(falling)
-                                falling_y = waveform.get_y_value(falling_n)
-                                print(f"Falling edge: X={falling:.6f}, Y[{falling_n}]={falling_y:.6f}")
-
-                                rising = waveform.find_edge_crossing(midlevel, "rising", "last")
-                                if rising is None:
-                                    raise Exception("[No_Rising_Edge_Found]")
-
-                                rising_n = waveform.calc_index_of_x(rising)
-                                rising_y = waveform.get_y_value(rising_n)
-                                print(f"Rising edge: X={rising:.6f}, Y[{rising_n}]={rising_y:.6f}")
-
-                                high_flat = waveform.search_flat(falling_n, -1, args.flat, tolerance)
-                                if high_flat is None:
-                                    raise Exception ("[High_Flat_Spot_Not_Found]")
-
-                                vhigh = waveform.get_y_value(high_flat)
-                                xhigh = waveform.get_x_value(high_flat)
-                                print(f"High n={high_flat:.0f}, X={xhigh:.6f}, Y={vhigh:.6f}")
-                                plt.scatter([xhigh], [vhigh], s=80, color='red', marker='o')
+        finally:
+            jpg_file_name = str(f"{file_prefix}_w{pulse_length:.0f}_{amplitude:.0f}mV.jpg")
+            print(f"Jpeg file: {jpg_file_name}")
 
-                                low_flat = waveform.search_flat(rising_n, -1, args.flat, tolerance)
-                                if low_flat is None:
-                                    raise Exception( "[Low_Flat_Spot_Not_Found]")
-
-                                vlow = waveform.get_y_value(low_flat)
-                                xlow = waveform.get_x_value(low_flat)
-                                print(f"Low n={low_flat:.1f}, X={xlow:.6f}, Y={vlow:.6f}")
-                                plt.scatter([xlow], [vlow], s=80, color='red', marker='o')
-
-                                amplitude_measurement = float(vhigh - vlow)
-                                print(f"Final amplitude is {amplitude_measurement:.3f}")
-                                good_count += 1
-
-                                plt.title(f"Amplitude {amplitude_measurement:.3f} {waveform.y_units}")
-
-                            except Exception as e:
-                                print(f"Exception encountered: {e}")
-                                amplitude_measurement = 0.0
-                                plt.title(f"Amplitude {amplitude_measurement:.3f} {waveform.y_units} {e}")
-
-                            finally:
-                                jpg_file_name = str(f"{file_prefix}_w{pulse_length:.0f}_{amplitude:.0f}mV.jpg")
-                                print(f"Jpeg file: {jpg_file_name}")
-
-                                plt.xlabel("Time (" + waveform.x_units + ")")
-                                plt.ylabel("Voltage (" + waveform.y_units + ")")
-
-                                plt.suptitle(
-                                    f"{waveform.name} - {serial_number}\n{pulser_mode.name}, Atten {attenuator_value:.0f}dB, DSP {dsp_mode_name[:4]}, ACComp {ac_mode.name}, W{pulse_length:.0f}, {amplitude:.0f} mV")
-
-                                plt.grid(True)
-                                # plt.legend()
-                                plt.tight_layout()
-                                plt.savefig(jpg_file_name, format="jpg", dpi=300)
-                                plt.show(block=False)
-                                plt.draw()
-                                plt.pause(1.0)
-                                # plt.close()
+            # drawn and saved by the renderer's worker processes while the sweep moves on
+            renderer.submit(jpg_file_name, waveform, title=title,
+                            suptitle=f"{waveform.name} - {serial_number}\n{pulser_mode.name}, Atten {attenuator_value:.0f}dB, DSP {dsp_mode_name[:4]}, ACComp {ac_mode.name}, W{pulse_length:.0f}, {amplitude:.0f} mV",
+                            markers=markers)
 
-                            results_ampl_setting.append(float(amplitude))
-                            results_length_setting.append(float(pulse_length))
-                            results_ampl_measurement.append(float(amplitude_measurement))
+        store.append({"SN": serial_number, "DateTime": date_time, "Mode": pulser_mode, "DSP": dsp_mode_name,
+                      "ACComp": ac_mode, "LenW": int(pulse_length), "AmplSet": float(amplitude),
+                      "Meas": float(amplitude_measurement), "Atten": float(attenuator_value), "Good": good})
+        return {"Meas": float(amplitude_measurement), "Good": good}
 
-                except Exception as e:
-                    Error = True
-                    print(f"Exception encountered: {e}")
-                finally:
-                    file = open(csv_file_name, mode="w", newline='')
-                    try:
-                        writer = csv.writer(file)
-                        writer.writerow(["SN", "DateTime", "Mode", "DSP", "ACComp", "LenW", "AmplSet", "Meas", "Atten"])
-
-                        for i in range(len(results_ampl_measurement)):
-                            writer.writerow([serial_number, date_time, pulser_mode.name, dsp_mode_name, str(ac_mode.name),
-                                             str(f"{results_length_setting[i]:.0f}"),
-                                             str(f"{results_ampl_setting[i]:.0f}"),
-                                             str(f"{results_ampl_measurement[i]:.3f}"), str(f"{attenuator_value:.0f}")])
-                        print(f"Write results to file: {csv_file_name}")
-                    finally:
-                        file.close()
-                if Error:
-                    break
-            if Error:
-                break
-        if Error:
-            break
+    pipeline = AcquisitionPipeline(analyze_point)
+    try:
+        sweep.run(measure_point)
+    except Exception as e:
+        print(f"Exception encountered: {e}")
+    finally:
+        pipeline.close()
+
+        # one CSV per pulser/AC/DSP configuration, including points done before a resume
+        configurations = {}
+        for point, result in sweep.results(nominal=True):
+            configuration = (point["pulser_mode"], point["ac_mode"], point["dsp_mode"])
+            configurations.setdefault(configuration, []).append((point, result))
+
+        for (pulser_mode, ac_mode, dsp_mode), rows in configurations.items():
+            csv_file_name = str(f'{configuration_prefix(pulser_mode, ac_mode, dsp_mode)}.csv')
+            file = open(csv_file_name, mode="w", newline='')
+            try:
+                writer = csv.writer(file)
+                writer.writerow(["SN", "DateTime", "Mode", "DSP", "ACComp", "LenW", "AmplSet", "Meas", "Atten"])
+
+                for point, result in rows:
+                    writer.writerow([serial_number, date_time, pulser_mode.name, dsp_name(dsp_mode), str(ac_mode.name),
+                                     str(f"{point['pulse_length']:.0f}"),
+                                     str(f"{point['amplitude']:.0f}"),
+                                     str(f"{result['Meas']:.3f}"), str(f"{attenuator_value:.0f}")])
+                print(f"Write results to file: {csv_file_name}")
+            finally:
+                file.close()
+
+    good_count = sum(1 for point, result in sweep.results() if result["Good"])
+
+    charts = renderer.close()
+    if charts["Failed"]:
+        print(f"{len(charts['Failed'])} chart(s) could not be written")
 
     print(f'Completed.  {good_count}-of-{run_count} Okay')
 
@@ -7,10 +7,13 @@ import time
 import tkinter as tk
 from tkinter import filedialog
 
-import matplotlib.pyplot as plt
-
 from OscilloscopeDevice import OscilloscopeDevice
 from Helper import *
+from TDS2000.PlotRenderer import PlotRenderer
+from TDS2000.SweepCoordinator import SweepCoordinator
+from TDS2000.SweepResults import SweepResultsStore
+from TDS2000.Waveform import Waveform
+from TDS2000.WaveformHistogram import WaveformHistogram
 from pyBitwiseAutomation import StepscopeDevice
 
 scope = OscilloscopeDevice()
@@ -147,150 +150,174 @@ try:
     results_ampl_measurement = []
 
     run_count = len(pulse_lengths_w) * len(amplitudes_mv)
-    run_progress = 0
     good_count = 0
     Error = False
+    # before any other threads are started: the renderer forks its worker processes here
+    renderer = PlotRenderer()
+    # every point of every run, for querying across sweeps; rows are written as they complete
+    store = SweepResultsStore(f"{results_path}sweep_results.bwsr", chunk_rows=1)
+
+    def pulser_side(point, index, sync):
+        pulse_length = point["pulse_length"]
+        amplitude = point["amplitude"]
+        print(f"Working on {index + 1}-of-{run_count}: W={pulse_length:.0f}, {amplitude:.0f} mV, ")
+        if using_accessory_flag:
+            stepscope.Pulse.setAccAmplMV(amplitude)
+            stepscope.Pulse.setAccWidth(map2accessoryLen(pulse_length))
+            time.sleep(0.5)
+        else:
+            stepscope.Pulse.setAmplMV(amplitude)
+            stepscope.Pulse.setLength(pulse_length)
+            time.sleep(0.5)
+        sync.wait()  # pulse is set
+        sync.wait()  # scope has captured it, the next point may be set up
+
+    def scope_side(point, index, sync):
+        pulse_length = point["pulse_length"]
+        # the time base does not depend on the signal, so it is set while the pulser changes
+        scope.set_horizontal_scale(12.8e-9 * pulse_length * 1.5)
+        sync.wait()  # pulse is set
+
+        # autoalign_on_pulse ends by waiting for the averages at the new settings
+        scope.autoalign_on_pulse(waveform_channel, pulse_length_time=12.8e-9*pulse_length, pulse_count=1.5)
+        running = scope.freeze_acquisition()
+        sync.wait()  # captured; the pulser moves on while the record is read out
+        try:
+            if waveform_channel == "MATH":
+                # inputs and difference from the same trigger, one pass
+                return scope.acquire_waveforms(("MATH", "CH1", "CH2"), names=("Scope Pulse", "CH1", "CH2"),
+                                               freeze=False)
+            return {waveform_channel: scope.get_waveform_data(waveform_channel, name="Scope Pulse")}
+        finally:
+            scope.resume_acquisition(running)
+
+    points = [{"pulse_length": pulse_length, "amplitude": amplitude}
+              for pulse_length in pulse_lengths_w for amplitude in amplitudes_mv]
+    coordinator = SweepCoordinator({"pulser": pulser_side, "scope": scope_side})
+    coordinator.progress = scope.progress
+    coordinator.timing = scope.timing
 
     try:
-        for pulse_length in pulse_lengths_w:
-            for amplitude in amplitudes_mv:
-                run_progress += 1
-                print(f"Working on {run_progress}-of-{run_count}: W={pulse_length:.0f}, {amplitude:.0f} mV, ")
-
-                if using_accessory_flag:
-                    stepscope.Pulse.setAccAmplMV(amplitude)
-                    stepscope.Pulse.setAccWidth(map2accessoryLen(pulse_length))
-                    time.sleep(0.5)
-                else:
-                    stepscope.Pulse.setAmplMV(amplitude)
-                    stepscope.Pulse.setLength(pulse_length)
-                    time.sleep(0.5)
-
-                scope.autoalign_on_pulse(waveform_channel, pulse_length_time=12.8e-9*pulse_length, pulse_count=1.5)
-                time.sleep(LONG_PAUSE)   # wait for averages to accumulate
-                waveform = scope.get_waveform_data(waveform_channel, name="Scope Pulse")
-
-                print(f"Acquire waveform for W={pulse_length:.0f}, {amplitude} mV, {waveform.count} samples")
-                waveform.appy_gain(gain)
-
-                if plt is not None:
-                    plt.close()
-
-                plt.figure()
-                # plt.plot(waveform.generate_x_values(), waveform.y_values, color='blue', linewidth=2, label='Waveform')
-
-                try:
-                    midlevel, minimum, maximum = waveform.get_mid_min_max()
-                    print(f"Levels: vMin {minimum:.3f}, vMid {midlevel:.3f}, vMax {maximum:.3f}")
-
-                    # ==========================
-
-                    rising = waveform.find_edge_crossing(midlevel, "rising", "last")
-                    if rising is None:
-                        raise Exception("[No_Rising_Edge_Found]")
-
-                    rising_n = waveform.calc_index_of_x(rising)
-                    rising_y = waveform.get_y_value(rising_n)
-                    print(f"Rising edge: X={rising:.6f}, Y[{rising_n}]={rising_y:.6f}")
-
-                    falling = waveform.find_edge_crossing(midlevel, "falling", "last")
-                    if falling is None:
-                        raise Exception("[No_Falling_Edge_Found]")
-
-                    falling_n = waveform.calc_index_of_x(falling)
-                    falling_y = waveform.get_y_value(falling_n)
-                    print(f"Falling edge: X={falling:.6f}, Y[{falling_n}]={falling_y:.6f}")
-
-                    # ==========================
-
-                    # one percent, clamped 0.1 to 1.0 mV range
-                    tolerance = max(0.1, min(1.0, abs(maximum - minimum) * 0.01))
-                    print(f"Tolerance is: {tolerance:.2f}")
-
-                    vhigh=None
-                    vlow=None
-
-                    if abs(maximum-minimum)>20.0 or args.histogram:
-                        high_flat = waveform.search_flat(falling_n, -1, args.flat, tolerance)
-                        if high_flat is not None:
-                            vhigh = waveform.get_y_value(high_flat)
-                            xhigh = waveform.get_x_value(high_flat)
-                            print(f"High n={high_flat:.0f}, X={xhigh:.6f}, Y={vhigh:.6f}")
-                            plt.scatter([xhigh], [vhigh], s=80, color='red', marker='o')
-
-                        low_flat = waveform.search_flat(rising_n, -1, args.flat, tolerance)
-                        if low_flat is not None:
-                            vlow = waveform.get_y_value(low_flat)
-                            xlow = waveform.get_x_value(low_flat)
-                            print(f"Low n={low_flat:.1f}, X={xlow:.6f}, Y={vlow:.6f}")
-                            plt.scatter([xlow], [vlow], s=80, color='red', marker='o')
-
-                    if vhigh is None or vlow is None :
-                        print("Try using histogram")
-                        counts, values = waveform.histogram()
-                        if counts is None:
-                            raise Exception( "[Histogram_Levels_Failed]")
-
-                        segm_x = [waveform.get_x_value(0),waveform.get_x_value(waveform.count-1)]
-
-                        for index in range(len(counts)):
-                            if values[index]<midlevel:
-                                vlow = values[index]
-                                print(f"Low Hist index={index}, Y={vlow:.6f}")
-                                plt.plot(segm_x, [vlow,vlow], color='red', linewidth=2, label='vLow')
-                                break
-
-                        for index in range(len(counts)):
-                            if values[index]>midlevel:
-                                vhigh = values[index]
-                                print(f"High Hist index={index}, Y={vhigh:.6f}")
-                                plt.plot(segm_x, [vhigh,vhigh], color='red', linewidth=2, label='vHigh')
-                                break
-
-                    if vhigh is None or vlow is None:
-                        raise Exception("[Unable_To_Locate_Levels]")
-
-                    # ==========================
-
-                    amplitude_measurement = float(vhigh - vlow)
-                    print(f"Final amplitude is {amplitude_measurement:.3f}")
-
-                    good_count += 1
-                    message=""
-
-                except Exception as e:
-                    print(f'Error during processing: {str(e)}')
-                    message=str(e)
-                finally:
-                    # jpg_file_name = file_prefix + "_w" + str(pulse_length) + "_" + str(amplitude) + "mV.jpg"
-                    jpg_file_name = str(f"{file_prefix}_w{pulse_length:.0f}_{amplitude:.0f}mV.jpg")
-                    print(f"Jpeg file: {jpg_file_name}")
-
-                    plt.plot(waveform.generate_x_values(), waveform.y_values, color='blue', linewidth=2,
-                             label='Waveform')
-                    plt.xlabel("Time (" + waveform.x_units + ")")
-                    plt.ylabel("Voltage (" + waveform.y_units + ")")
-
-                    plt.suptitle(
-                        f"{waveform.name} - {serial_number}\n{pulser_mode.name}, Atten {attenuator_value:.0f}dB, W{pulse_length:.0f}, {amplitude:.0f} mV")
-                    plt.title(f"Amplitude {amplitude_measurement:.3f} {waveform.y_units} {message}")
-                    plt.grid(True)
-                    # plt.legend()
-                    plt.tight_layout()
-
-                    plt.savefig(jpg_file_name, format="jpg", dpi=300)
-                    plt.show(block=False)
-                    plt.pause(0.25)
-                    #plt.close()
-
-                results_ampl_setting.append(float(amplitude))
-                results_length_setting.append(float(pulse_length))
-                results_ampl_measurement.append(float(amplitude_measurement))
+        for point, sides in coordinator.run(points):
+            pulse_length = point["pulse_length"]
+            amplitude = point["amplitude"]
+
+            waveforms = sides["scope"]
+            waveform = waveforms[waveform_channel]
+            if waveform_channel == "MATH":
+                Waveform.create_combined_file(list(waveforms.values()),
+                                              f"{file_prefix}_w{pulse_length:.0f}_{amplitude:.0f}mV.csv")
+
+            print(f"Acquire waveform for W={pulse_length:.0f}, {amplitude} mV, {waveform.count} samples")
+            waveform.appy_gain(gain)
+
+            markers = []
+            levels = []
+
+            # a point that cannot be measured is recorded as NaN, never as the previous point's value
+            amplitude_measurement = float("nan")
+            try:
+                midlevel, minimum, maximum = waveform.get_mid_min_max()
+                print(f"Levels: vMin {minimum:.3f}, vMid {midlevel:.3f}, vMax {maximum:.3f}")
+
+                # ==========================
+
+                rising = waveform.find_edge_crossing(midlevel, "rising", "last")
+                if rising is None:
+                    raise Exception("[No_Rising_Edge_Found]")
+
+                rising_n = waveform.calc_index_of_x(rising)
+                rising_y = waveform.get_y_value(rising_n)
+                print(f"Rising edge: X={rising:.6f}, Y[{rising_n}]={rising_y:.6f}")
+
+                falling = waveform.find_edge_crossing(midlevel, "falling", "last")
+                if falling is None:
+                    raise Exception("[No_Falling_Edge_Found]")
+
+                falling_n = waveform.calc_index_of_x(falling)
+                falling_y = waveform.get_y_value(falling_n)
+                print(f"Falling edge: X={falling:.6f}, Y[{falling_n}]={falling_y:.6f}")
+
+                # ==========================
+
+                # one percent, clamped 0.1 to 1.0 mV range
+                tolerance = max(0.1, min(1.0, abs(maximum - minimum) * 0.01))
+                print(f"Tolerance is: {tolerance:.2f}")
+
+                vhigh=None
+                vlow=None
+
+                if abs(maximum-minimum)>20.0 or args.histogram:
+                    high_flat = waveform.search_flat(falling_n, -1, args.flat, tolerance)
+                    if high_flat is not None:
+                        vhigh = waveform.get_y_value(high_flat)
+                        xhigh = waveform.get_x_value(high_flat)
+                        print(f"High n={high_flat:.0f}, X={xhigh:.6f}, Y={vhigh:.6f}")
+                        markers.append((xhigh, vhigh))
+
+                    low_flat = waveform.search_flat(rising_n, -1, args.flat, tolerance)
+                    if low_flat is not None:
+                        vlow = waveform.get_y_value(low_flat)
+                        xlow = waveform.get_x_value(low_flat)
+                        print(f"Low n={low_flat:.1f}, X={xlow:.6f}, Y={vlow:.6f}")
+                        markers.append((xlow, vlow))
+
+                if vhigh is None or vlow is None :
+                    print("Try using histogram")
+                    histogram = WaveformHistogram().add(waveform)
+                    segm_x = [waveform.get_x_value(0),waveform.get_x_value(waveform.count-1)]
+
+                    # most common level on each side of the mid level
+                    vlow = histogram.base_level(midlevel)
+                    if vlow is not None:
+                        print(f"Low Hist Y={vlow:.6f}")
+                        levels.append((segm_x[0], segm_x[1], vlow))
+
+                    vhigh = histogram.top_level(midlevel)
+                    if vhigh is not None:
+                        print(f"High Hist Y={vhigh:.6f}")
+                        levels.append((segm_x[0], segm_x[1], vhigh))
+
+                if vhigh is None or vlow is None:
+                    raise Exception("[Unable_To_Locate_Levels]")
+
+                # ==========================
+
+                amplitude_measurement = float(vhigh - vlow)
+                print(f"Final amplitude is {amplitude_measurement:.3f}")
+
+                good_count += 1
+                message=""
+
+            except Exception as e:
+                print(f'Error during processing: {str(e)}')
+                message=str(e)
+            finally:
+                # jpg_file_name = file_prefix + "_w" + str(pulse_length) + "_" + str(amplitude) + "mV.jpg"
+                jpg_file_name = str(f"{file_prefix}_w{pulse_length:.0f}_{amplitude:.0f}mV.jpg")
+                print(f"Jpeg file: {jpg_file_name}")
+
+                # drawn and saved by the renderer's worker processes while the sweep moves on
+                renderer.submit(jpg_file_name, waveform,
+                                title=f"Amplitude {amplitude_measurement:.3f} {waveform.y_units} {message}",
+                                suptitle=f"{waveform.name} - {serial_number}\n{pulser_mode.name}, Atten {attenuator_value:.0f}dB, W{pulse_length:.0f}, {amplitude:.0f} mV",
+                                markers=markers, levels=levels)
+
+            results_ampl_setting.append(float(amplitude))
+            results_length_setting.append(float(pulse_length))
+            results_ampl_measurement.append(float(amplitude_measurement))
+            store.append({"SN": serial_number, "DateTime": date_time, "Mode": pulser_mode, "LenW": int(pulse_length),
+                          "AmplSet": float(amplitude), "Meas": float(amplitude_measurement),
+                          "Atten": float(attenuator_value), "Good": message == ""})
 
     except Exception as e:
         Error = True
         print(f"Exception encountered: {e}")
     finally:
+        charts = renderer.close()
+        if charts["Failed"]:
+            print(f"{len(charts['Failed'])} chart(s) could not be written")
+
         print(f"Write results to file: {csv_file_name}")
 
         if len(results_ampl_measurement) > 0:
@@ -0,0 +1,284 @@
+import json
+import os
+import struct
+from enum import Enum
+
+import numpy
+
+# Append-only file of chunks, each:
+#   CHUNK_MAGIC, header length (u32), UTF-8 JSON header {"descr": [[name, dtype], ...], "rows": n},
+#   then n rows of that structured dtype, little-endian.
+# A chunk cut short by a crash is ignored when reading, so earlier rows are never lost, and is
+# cut off before the next append, so a resumed run does not write after the broken chunk.
+CHUNK_MAGIC = b"BWSR"
+CHUNK_HEADER = struct.Struct("<4sI")
+DEFAULT_TEXT = "U32"
+
+
+def _field_dtype(value):
+    if isinstance(value, (bool, numpy.bool_)):
+        return "?"
+    if isinstance(value, (int, numpy.integer)):
+        return "<i8"
+    if isinstance(value, (float, numpy.floating)):
+        return "<f8"
+    return "<" + DEFAULT_TEXT
+
+
+def _storable(value):
+    if isinstance(value, Enum):
+        return value.name
+    if value is None:
+        return ""
+    return value
+
+
+def _missing(dtype):
+    kind = numpy.dtype(dtype).kind
+    if kind == "f":
+        return numpy.nan
+    if kind in "iu":
+        return 0
+    if kind == "b":
+        return False
+    return ""
+
+
+def _parse_chunk(data, position):
+    """(table, end) of the chunk at `position`, or None if it is not a whole, valid chunk."""
+    if position + CHUNK_HEADER.size > len(data):
+        return None
+    magic, header_length = CHUNK_HEADER.unpack_from(data, position)
+    start = position + CHUNK_HEADER.size
+    if magic != CHUNK_MAGIC or start + header_length > len(data):
+        return None
+    try:
+        header = json.loads(data[start:start + header_length].decode("utf-8"))
+        dtype = numpy.dtype([(name, code) for name, code in header["descr"]])
+        rows = int(header["rows"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    start += header_length
+    end = start + rows * dtype.itemsize
+    if rows < 0 or end > len(data):
+        return None
+    return numpy.frombuffer(data, dtype=dtype, count=rows, offset=start), end
+
+
+def _scan_chunks(data, file_name):
+    """
+    Tables of all whole chunks, and the end of the last one.  After a damaged chunk (a crash in
+    an older file that was appended to later) reading resumes at the next chunk magic.
+    """
+    if len(data) >= len(CHUNK_MAGIC) and not data.startswith(CHUNK_MAGIC):
+        raise ValueError(f"{file_name} is not a sweep results file")
+    tables = []
+    position = 0
+    end = 0
+    while position < len(data):
+        chunk = _parse_chunk(data, position)
+        if chunk is None:
+            position = data.find(CHUNK_MAGIC, position + 1)
+            if position < 0:
+                break
+            continue
+        table, position = chunk
+        tables.append(table)
+        end = position
+    return tables, end
+
+
+class SweepResults:
+    """A read-only table of sweep results (NumPy structured array) with filtering and grouping."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return self._table.size
+
+    def __getitem__(self, name):
+        return self._table[name]
+
+    def __iter__(self):
+        for row in self._table:
+            yield dict(zip(self.names, row.tolist()))
+
+    @property
+    def names(self):
+        return list(self._table.dtype.names or ())
+
+    @property
+    def table(self):
+        return self._table
+
+    def column(self, name):
+        return self._table[name]
+
+    def where(self, mask):
+        return SweepResults(self._table[numpy.asarray(mask, dtype=bool)])
+
+    def filter(self, **conditions):
+        """
+        Rows matching every condition: a value (Enums match by name), a list/tuple/set of
+        allowed values, or a function of the column returning a boolean array.
+        """
+        mask = numpy.ones(self._table.size, dtype=bool)
+        for name, condition in conditions.items():
+            column = self._table[name]
+            if callable(condition):
+                mask &= numpy.asarray(condition(column), dtype=bool)
+            elif isinstance(condition, (list, tuple, set)):
+                mask &= numpy.isin(column, [_storable(c) for c in condition])
+            else:
+                mask &= column == _storable(condition)
+        return self.where(mask)
+
+    def group_by(self, *names) -> dict:
+        """{key tuple: SweepResults} for each distinct combination of the named columns, in order of appearance."""
+        if not names:
+            raise ValueError("group_by needs at least one column")
+        keys = numpy.rec.fromarrays([self._table[name] for name in names], names=list(names))
+        unique, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+        order = numpy.argsort(first)
+        sort_rows = numpy.argsort(inverse.ravel(), kind="stable")
+        bounds = numpy.searchsorted(inverse.ravel()[sort_rows], numpy.arange(unique.size + 1))
+
+        answer = {}
+        for group in order:
+            rows = sort_rows[bounds[group]:bounds[group + 1]]
+            answer[tuple(unique[group].tolist())] = SweepResults(self._table[rows])
+        return answer
+
+    def sort(self, *names):
+        return SweepResults(numpy.sort(self._table, order=list(names), kind="stable"))
+
+    def write_csv(self, file_name: str, names=None):
+        names = self.names if names is None else list(names)
+        with open(file_name, "w", newline="") as f:
+            f.write(",".join(names) + "\n")
+            for row in self._table[names].tolist():
+                f.write(",".join(str(value) for value in row) + "\n")
+
+    @staticmethod
+    def concatenate(results):
+        """Join several tables; columns missing from some are filled with NaN, 0, False or ""."""
+        tables = [r.table if isinstance(r, SweepResults) else r for r in results]
+        tables = [t for t in tables if t.dtype.names]
+        if not tables:
+            return SweepResults(numpy.empty(0, dtype=[]))
+
+        descr = []
+        for table in tables:
+            for name in table.dtype.names:
+                dtype = table.dtype[name]
+                known = [i for i, (n, _) in enumerate(descr) if n == name]
+                if not known:
+                    descr.append((name, dtype))
+                else:
+                    # widen strings, promote numbers
+                    descr[known[0]] = (name, numpy.promote_types(descr[known[0]][1], dtype))
+
+        combined = numpy.empty(sum(t.size for t in tables), dtype=descr)
+        start = 0
+        for table in tables:
+            end = start + table.size
+            for name, dtype in descr:
+                if name in table.dtype.names:
+                    combined[name][start:end] = table[name]
+                else:
+                    combined[name][start:end] = _missing(dtype)
+            start = end
+        return SweepResults(combined)
+
+
+class SweepResultsStore:
+    """
+    Append-only columnar store of sweep results in one binary file.  append() takes dicts (one
+    per sweep point); rows are buffered and written in chunks of `chunk_rows`, and on flush()
+    or close().  The columns and types come from the first row unless `fields` gives them, as a
+    list of (name, numpy dtype); text columns are fixed width (32 characters by default).
+    """
+
+    def __init__(self, file_name: str, fields=None, chunk_rows=256):
+        self._file_name = file_name
+        self._dtype = None if fields is None else numpy.dtype(list(fields)).newbyteorder("<")
+        self._chunk_rows = max(1, int(chunk_rows))
+        self._pending = []
+        self._tail_checked = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def file_name(self):
+        return self._file_name
+
+    def append(self, row: dict):
+        if self._dtype is None:
+            self._dtype = numpy.dtype([(name, _field_dtype(_storable(value))) for name, value in row.items()])
+        self._pending.append(tuple(_storable(row.get(name, _missing(self._dtype[name])))
+                                   for name in self._dtype.names))
+        if len(self._pending) >= self._chunk_rows:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        if not self._pending:
+            return
+        table = numpy.array(self._pending, dtype=self._dtype)
+        header = json.dumps({"descr": [[name, self._dtype[name].str] for name in self._dtype.names],
+                             "rows": table.size}).encode("utf-8")
+        self._repair_tail()
+        with open(self._file_name, "ab") as f:
+            f.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(header)) + header + table.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = []
+
+    def close(self):
+        self.flush()
+
+    def _repair_tail(self):
+        """Truncate a chunk left incomplete by a crash, once, before this store first writes."""
+        if self._tail_checked:
+            return
+        self._tail_checked = True
+        if not os.path.exists(self._file_name):
+            return
+        with open(self._file_name, "rb") as f:
+            data = f.read()
+        _, end = _scan_chunks(data, self._file_name)
+        if end < len(data):
+            print(f"Dropping {len(data) - end} bytes of an incomplete chunk at the end of {self._file_name}")
+            with open(self._file_name, "r+b") as f:
+                f.truncate(end)
+
+    def load(self) -> SweepResults:
+        """Everything written so far (including unflushed rows) as one table."""
+        tables = SweepResultsStore.read_chunks(self._file_name) if os.path.exists(self._file_name) else []
+        if self._pending:
+            tables.append(numpy.array(self._pending, dtype=self._dtype))
+        return SweepResults.concatenate(tables)
+
+    @staticmethod
+    def read_chunks(file_name: str) -> list:
+        with open(file_name, "rb") as f:
+            data = f.read()
+        tables, _ = _scan_chunks(data, file_name)
+        return tables
+
+    @staticmethod
+    def load_many(file_names) -> SweepResults:
+        """Join the results of several store files, e.g. from different instruments or nights."""
+        tables = []
+        for file_name in file_names:
+            tables.extend(SweepResultsStore.read_chunks(file_name))
+        return SweepResults.concatenate(tables)
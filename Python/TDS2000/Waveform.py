@@ -2,12 +2,15 @@ from math import floor, ceil
 from collections import Counter
 from typing import List, Tuple
 
+import numpy
+
 class Waveform:
     def __init__(self, name="no_name"):
         self._name = name
         self._offset = 0.0
         self._span = 0.0
-        self._y_values = []
+        self._y_values = Waveform._read_only(numpy.empty(0, dtype=float))
+        self._x_values = None
         self._debug = False
         self._progress = False
         self._x_units = ""
@@ -53,6 +56,11 @@ class Waveform:
         if self.progress:
             print("[PROGRESS]", msg)
 
+    @staticmethod
+    def _read_only(arr):
+        arr.flags.writeable = False
+        return arr
+
     @property
     def name(self):
         return self._name
@@ -63,7 +71,7 @@ class Waveform:
 
     @property
     def count(self):
-        return len(self._y_values)
+        return self._y_values.size
 
     @property
     def offset(self):
@@ -72,7 +80,8 @@ class Waveform:
     @offset.setter
     def offset(self, val):
         self._offset = float(val)
-        self._debug_print("Waveform offset={self._offset:.6e}")
+        self._x_values = None
+        self._debug_print(f"Waveform offset={self._offset:.6e}")
 
     @property
     def span(self):
@@ -81,11 +90,13 @@ class Waveform:
     @span.setter
     def span(self, val):
         self._span = float(val)
-        self._debug_print("Waveform span={self._span:.6e}")
+        self._x_values = None
+        self._debug_print(f"Waveform span={self._span:.6e}")
 
     @property
     def y_values(self):
-        return self._y_values.copy()
+        """Read-only view of the samples (no copy)."""
+        return self._y_values
 
     def get_y_value(self, index):
         index = floor(index)
@@ -101,7 +112,8 @@ class Waveform:
         return float(self._offset + index * dx)
 
     def set_y_values(self, arr):
-        self._y_values = list(map(float, arr))
+        self._y_values = Waveform._read_only(numpy.array(arr, dtype=float))
+        self._x_values = None
 
     def print(self, pre_message="Waveform:"):
         if pre_message is not None:
@@ -110,100 +122,186 @@ class Waveform:
         print(f" Name: {self.name}")
         print(f" Offset: {self.offset:.3f} {self.x_units}")
         print(f" Span: {self.span:.6f} {self.x_units}")
-        print(f" Count: {len(self.y_values)}")
+        print(f" Count: {self.count}")
         print(f" Y-units: {self.y_units}")
 
     def generate_x_values(self):
+        """Read-only x-axis, computed once and cached until offset, span or samples change."""
         self._debug_print("generate_x_values")
 
-        count = len(self._y_values)
-        if count <= 1 or self._span <= 0.0:
-            return []
-
-        dx = self._span / (count - 1)
-        self._debug_print(f"count={count}, offset={self.offset:.6f}, span={self.span:.6f}, dx={dx:.6f}")
+        if self._x_values is None:
+            count = self.count
+            if count <= 1 or self._span <= 0.0:
+                self._x_values = Waveform._read_only(numpy.empty(0, dtype=float))
+            else:
+                dx = self._span / (count - 1)
+                self._debug_print(f"count={count}, offset={self.offset:.6f}, span={self.span:.6f}, dx={dx:.6f}")
+                self._x_values = Waveform._read_only(self._offset + numpy.arange(count) * dx)
 
-        return [self._offset + i * dx for i in range(count)]
+        return self._x_values
 
     def generate_x_indexes(self):
         self._debug_print("generate_x_indexes")
-        count = len(self._y_values)
+        count = self.count
         if count <= 1 or self._span <= 0.0:
-            return []
-        return list(range(count))
+            return numpy.empty(0, dtype=int)
+        return numpy.arange(count)
 
     def get_mid_min_max(self):
         self._progress_print("Find minimum, midpoint, maximum")
-        if not self._y_values:
+        if self.count == 0:
             raise ValueError("Waveform has no data")
-        min_val = min(self._y_values)
-        max_val = max(self._y_values)
+        min_val = float(self._y_values.min())
+        max_val = float(self._y_values.max())
         mid_val = 0.5 * (min_val + max_val)
         self._debug_print(f"Min: {min_val}, Max: {max_val}, Mid: {mid_val}")
         return mid_val, min_val, max_val
 
-    def find_edge_crossing(self, threshold, edge_type="falling", direction="first"):
-        self._progress_print(f"Find {direction} {edge_type} edge at threshold {threshold:.6f}")
-
+    @staticmethod
+    def _check_edge_args(edge_type, direction):
         if edge_type not in ("falling", "rising"):
             raise ValueError("edge_type must be 'falling' or 'rising'")
-        if direction not in ("first", "last"):
-            raise ValueError("direction must be 'first' or 'last'")
+        if direction not in ("first", "last", "all"):
+            raise ValueError("direction must be 'first', 'last' or 'all'")
 
-        y = self._y_values
-        x = self.generate_x_values()
-        indices = range(len(y))
-        first_flag = True
-        prior_i = 0
-        if direction == "last":
-            indices = reversed(indices)
+    @staticmethod
+    def _edge_crossings(y, x, threshold, edge_type, direction):
+        """
+        Locate threshold crossings for every row of `y` (rows x samples) in one pass.
 
-        for i in indices:
-            self._debug_print(f" y[{i}]={y[i]:.6f}, x[{i}]={x[i]:.6e}")
+        `x` is the matching x-axis (one row, or one per row of `y`) and `threshold` a scalar
+        or one value per row.  For "first"/"last" returns an array with one interpolated x
+        per row (NaN where none); for "all" returns a list with one array per row.
 
-            if first_flag:
-                first_flag = False
-                prior_i = i
-                continue
+        "first" and "all" match the forward scan (prev > t >= curr for falling), "last"
+        matches the backward scan (prev < t <= curr walking right to left).
+        """
+        Waveform._check_edge_args(edge_type, direction)
 
-            prev = y[prior_i]
-            curr = y[i]
-
-            if direction == "first" and edge_type == "falling" and prev > threshold >= curr:
-                edge_label = "falling"
-            elif direction == "last" and edge_type == "falling" and prev < threshold <= curr:
-                edge_label = "falling"
-            elif direction == "first" and edge_type == "rising" and prev < threshold <= curr:
-                edge_label = "rising"
-            elif direction == "last" and edge_type == "rising" and prev > threshold >= curr:
-                edge_label = "rising"
-            else:
-                prior_i = i
-                continue
+        y = numpy.atleast_2d(y)
+        rows, count = y.shape
+        x = numpy.broadcast_to(numpy.atleast_2d(x), y.shape)
+        t = numpy.broadcast_to(numpy.asarray(threshold, dtype=float).reshape(-1, 1), (rows, 1))
+
+        if count < 2:
+            return [numpy.empty(0) for _ in range(rows)] if direction == "all" else numpy.full(rows, numpy.nan)
 
-            dy = curr - prev
-            dx = x[i] - x[prior_i]
+        left = y[:, :-1]
+        right = y[:, 1:]
 
-            if dy != 0:
-                x_val = x[prior_i] + ((threshold - prev) * dx) / dy
+        # k marks the pair (k, k+1); prev/curr offsets give the scan order of the original search
+        if direction == "last":
+            if edge_type == "falling":
+                mask = (right < t) & (left >= t)
+            else:
+                mask = (right > t) & (left <= t)
+            prev_offset, curr_offset = 1, 0
+        else:
+            if edge_type == "falling":
+                mask = (left > t) & (right <= t)
             else:
-                x_val = (x[i] + x[prior_i]) / 2.0
+                mask = (left < t) & (right >= t)
+            prev_offset, curr_offset = 0, 1
+
+        def interpolate(r, k):
+            prev_y = y[r, k + prev_offset]
+            curr_y = y[r, k + curr_offset]
+            prev_x = x[r, k + prev_offset]
+            curr_x = x[r, k + curr_offset]
+            dy = curr_y - prev_y
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                answer = prev_x + ((t[r, 0] - prev_y) * (curr_x - prev_x)) / dy
+            return numpy.where(dy != 0, answer, (curr_x + prev_x) / 2.0)
+
+        if direction == "all":
+            answer = []
+            for r in range(rows):
+                k = numpy.flatnonzero(mask[r])
+                answer.append(interpolate(r, k))
+            return answer
+
+        found = mask.any(axis=1)
+        if direction == "first":
+            k = mask.argmax(axis=1)
+        else:
+            k = (count - 2) - mask[:, ::-1].argmax(axis=1)
+
+        r = numpy.arange(rows)
+        return numpy.where(found, interpolate(r, k), numpy.nan)
+
+    def find_edge_crossing(self, threshold, edge_type="falling", direction="first"):
+        """
+        Interpolated x of the `direction` ("first", "last") `edge_type` crossing of `threshold`,
+        or None if not found.  With direction "all" returns an array of every such crossing.
+        """
+        self._progress_print(f"Find {direction} {edge_type} edge at threshold {threshold:.6f}")
+        Waveform._check_edge_args(edge_type, direction)
 
-            self._debug_print(f"Interpolated {edge_label} edge X: {x_val:.6e}")
-            return x_val
+        x = self.generate_x_values()
+        if x.size < 2:
+            self._debug_print(" Warning: None found")
+            return numpy.empty(0) if direction == "all" else None
 
-        self._debug_print(" Warning: None found")
-        return None
+        answer = Waveform._edge_crossings(self._y_values, x, threshold, edge_type, direction)[0]
+
+        if direction == "all":
+            self._debug_print(f"Found {answer.size} {edge_type} edges")
+            return answer
+
+        if numpy.isnan(answer):
+            self._debug_print(" Warning: None found")
+            return None
+
+        self._debug_print(f"Interpolated {edge_type} edge X: {answer:.6e}")
+        return float(answer)
+
+    def find_all_edge_crossings(self, threshold):
+        """Every rising and every falling crossing of `threshold`, as two arrays of interpolated x."""
+        return (self.find_edge_crossing(threshold, "rising", "all"),
+                self.find_edge_crossing(threshold, "falling", "all"))
+
+    @staticmethod
+    def find_edge_crossing_batch(waveforms, threshold, edge_type="falling", direction="first"):
+        """
+        find_edge_crossing() across a list of Waveforms, with one threshold for all or one per waveform.
+
+        Waveforms of equal length are processed together as one 2-D array.  Returns a list with
+        one result per waveform, in the same form as find_edge_crossing().
+        """
+        thresholds = numpy.broadcast_to(numpy.asarray(threshold, dtype=float), (len(waveforms),))
+        answer = [None] * len(waveforms)
+
+        groups = {}
+        for index, wf in enumerate(waveforms):
+            groups.setdefault(wf.count, []).append(index)
+
+        for count, indexes in groups.items():
+            if count < 2 or any(waveforms[i].generate_x_values().size < 2 for i in indexes):
+                for i in indexes:
+                    answer[i] = waveforms[i].find_edge_crossing(thresholds[i], edge_type, direction)
+                continue
+
+            y = numpy.stack([waveforms[i].y_values for i in indexes])
+            x = numpy.stack([waveforms[i].generate_x_values() for i in indexes])
+            results = Waveform._edge_crossings(y, x, thresholds[indexes], edge_type, direction)
+
+            for n, i in enumerate(indexes):
+                if direction == "all":
+                    answer[i] = results[n]
+                else:
+                    answer[i] = None if numpy.isnan(results[n]) else float(results[n])
+
+        return answer
 
     def calc_x_of_index(self, index):
-        count = len(self._y_values)
+        count = self.count
         index = max(0, min(index, count - 1))
         x_val = self._offset + index * (self._span / (count - 1))
         self._debug_print(f"Index {index} maps to X = {x_val:.6e}")
         return x_val
 
     def calc_index_of_x(self, x_value):
-        count = len(self._y_values)
+        count = self.count
         if count < 2 or self._span == 0:
             return 0
         delta_x = self._span / (count - 1)
@@ -212,18 +310,75 @@ class Waveform:
         self._debug_print(f"X {x_value:.6e} maps to index = {index}")
         return index
 
+    def _csv_x_values(self):
+        """X-axis exactly as calc_x_of_index() computes it, without the span <= 0 special case."""
+        count = self.count
+        if count == 0:
+            return numpy.empty(0)
+        dx = self._span / (count - 1)
+        return self._offset + numpy.arange(count) * dx
+
+    @staticmethod
+    def _format_column(values, fmt="%.6f"):
+        """Format a whole column with one %-operation; same text as f"{v:.6f}" per value."""
+        count = len(values)
+        if count == 0:
+            return []
+        return ((fmt + "\n") * count % tuple(numpy.asarray(values, dtype=float).tolist())).split("\n")[:-1]
+
     def create_file( self,file_name:str, message:str="")  :
         self._progress_print(f'Waveform:create_file(), file_name={file_name}, message={message}')
 
+        count = self.count
+        if count > 0:
+            pairs = numpy.empty(2 * count, dtype=float)
+            pairs[0::2] = self._csv_x_values()
+            pairs[1::2] = self._y_values
+            body = ("%.6f,%.6f\n" * count) % tuple(pairs.tolist())
+        else:
+            body = ""
+
         try:
             with open(file_name, "w") as f:
-                f.write(f"MESSAGE,{message}\n")
-                f.write("TIME,VOLTS\n")
-                count = len(self._y_values)
-                for index in range(count):
-                    y = self.get_y_value(index)
-                    x = self.calc_x_of_index(index)
-                    f.write(f"{x:.6f},{y:.6f}\n")
+                f.write(f"MESSAGE,{message}\nTIME,VOLTS\n" + body)
+        except IOError as e:
+            print(f"Failed to write to {file_name}: {e}")
+
+    @staticmethod
+    def create_combined_file(waveforms, file_name: str, message: str = ""):
+        """
+        Write several waveforms side-by-side in one CSV file, with the same MESSAGE line and
+        number format as create_file().  Waveforms sharing one x-axis get a single TIME column
+        followed by one column per waveform name; otherwise each waveform gets its own TIME and
+        value column pair, with shorter columns left empty.
+        """
+        if len(waveforms) == 0:
+            raise ValueError("No waveforms to write")
+
+        first = waveforms[0]
+        shared = all(wf.count == first.count and wf.offset == first.offset and wf.span == first.span
+                     for wf in waveforms)
+
+        if shared:
+            header = ["TIME"] + [wf.name for wf in waveforms]
+            columns = [Waveform._format_column(first._csv_x_values())]
+            columns += [Waveform._format_column(wf.y_values) for wf in waveforms]
+        else:
+            header = []
+            columns = []
+            for wf in waveforms:
+                header += ["TIME", wf.name]
+                columns += [Waveform._format_column(wf._csv_x_values()), Waveform._format_column(wf.y_values)]
+
+        rows = max(len(column) for column in columns)
+        for column in columns:
+            column.extend([""] * (rows - len(column)))
+
+        body = "".join(line + "\n" for line in map(",".join, zip(*columns)))
+
+        try:
+            with open(file_name, "w") as f:
+                f.write(f"MESSAGE,{message}\n" + ",".join(header) + "\n" + body)
         except IOError as e:
             print(f"Failed to write to {file_name}: {e}")
 
@@ -235,12 +390,12 @@ class Waveform:
         Sorted by descending by frequency/counts
         """
 
-        self._progress_print(f"Histogram {len(self._y_values)} items")
+        self._progress_print(f"Histogram {self.count} items")
 
-        if self._y_values is None or len(self._y_values)==0 :
+        if self.count == 0:
             return None, None
 
-        counter = Counter(self._y_values)
+        counter = Counter(self._y_values.tolist())
         # sort only by count (descending)
         items = sorted(counter.items(), key=lambda kv: kv[1], reverse=True)
         values = [val for val, _ in items]
@@ -262,16 +417,50 @@ class Waveform:
         if direction not in (+1, -1):
             raise ValueError("Direction must be +1 or -1")
 
-        answer = None
-        index = start_index
-        while 0 <= index < len(self.y_values):
-            if self._y_values[index]==value:
-                answer = self.get_x_value(index)
-                break
-            index += direction
+        if not 0 <= start_index < self.count:
+            return None
 
-        return answer
+        if direction > 0:
+            hits = numpy.flatnonzero(self._y_values[start_index:] == value)
+            index = start_index + hits[0] if hits.size > 0 else None
+        else:
+            hits = numpy.flatnonzero(self._y_values[:start_index + 1] == value)
+            index = hits[-1] if hits.size > 0 else None
 
+        if index is None:
+            return None
+
+        return self.get_x_value(int(index))
+
+
+    @staticmethod
+    def _sliding_min_max(y, width):
+        """
+        Minimum and maximum of every window y[i:i+width], i = 0..n-width, in O(n)
+        using block prefix/suffix extrema (van Herk / Gil-Werman).
+        """
+        n = y.size
+        blocks = -(-n // width)
+        padded = numpy.empty(blocks * width, dtype=float)
+        padded[:n] = y
+
+        windows = n - width + 1
+        answer = []
+        for fill, accumulate in ((numpy.inf, numpy.minimum), (-numpy.inf, numpy.maximum)):
+            padded[n:] = fill
+            grid = padded.reshape(blocks, width)
+            prefix = accumulate.accumulate(grid, axis=1).ravel()
+            suffix = accumulate.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+            answer.append(accumulate(suffix[:windows], prefix[width - 1:width - 1 + windows]))
+
+        return answer[0], answer[1]
+
+    def _flat_starts(self, required_count, tolerance):
+        """Boolean per window start i: all of y[i:i+required_count] are within tolerance of y[i]."""
+        y = self._y_values
+        wmin, wmax = Waveform._sliding_min_max(y, required_count)
+        base = y[:wmin.size]
+        return ((wmax - base) <= tolerance) & ((base - wmin) <= tolerance)
 
     def search_flat(self, start_index, direction, required_count=20, tolerance=1e-6):
         """
@@ -287,46 +476,172 @@ class Waveform:
             raise ValueError("Direction must be +1 or -1")
 
         y = self._y_values
-        n = len(y)
-
-        i = start_index
-
-        while 0 <= i < n - (required_count - 1) * abs(direction):
-            flat = True
-            base_value = y[i]
-
-            for j in range(1, required_count):
-                neighbor_index = i + j * direction
-                if not (0 <= neighbor_index < n):
-                    flat = False
-                    break
+        n = y.size
+        required_count = max(1, int(required_count))
+
+        # the scan stops at n - (required_count - 1) in either direction
+        last_start = n - required_count
+        if required_count > n or not 0 <= start_index <= last_start:
+            self._debug_print("No flat region found")
+            return None
+
+        wmin, wmax = Waveform._sliding_min_max(y, required_count)
+
+        if direction > 0:
+            # window y[i:i+required_count], compared with its first sample y[i]
+            base = y[start_index:last_start + 1]
+            flat = ((wmax[start_index:] - base) <= tolerance) & ((base - wmin[start_index:]) <= tolerance)
+            hits = numpy.flatnonzero(flat)
+            i = start_index + int(hits[0]) if hits.size > 0 else None
+        else:
+            # window y[i-required_count+1:i+1], compared with its last sample y[i]
+            first = required_count - 1
+            if start_index < first:
+                self._debug_print("No flat region found")
+                return None
+            base = y[first:start_index + 1]
+            lo = wmin[:start_index + 1 - first]
+            hi = wmax[:start_index + 1 - first]
+            flat = ((hi - base) <= tolerance) & ((base - lo) <= tolerance)
+            hits = numpy.flatnonzero(flat)
+            i = first + int(hits[-1]) if hits.size > 0 else None
+
+        if i is None:
+            self._debug_print("No flat region found")
+            return None
+
+        self._debug_print(f"Found flat region starting at index {i}")
+        return max(0, min(n - 1, floor(i + direction * required_count / 2)))
+
+    def find_flat_regions(self, required_count=20, tolerance=1e-6):
+        """
+        Every flat region, as a list of (start, end, level) with inclusive sample indexes and
+        the mean level.  A region is the union of overlapping runs of `required_count` samples
+        that are each within `tolerance` of the run's first sample.
+        """
+        self._progress_print(f"Find flat regions, count {required_count}, tolerance {tolerance}")
 
-                diff = abs(y[neighbor_index] - base_value)
+        required_count = max(1, int(required_count))
+        if required_count > self.count:
+            return []
 
-                if j > 1:
-                    self._debug_print(f" Y[{neighbor_index}]={y[neighbor_index]:.6f}, diff={diff:.6f}")
+        flat = self._flat_starts(required_count, tolerance)
 
-                if diff > tolerance:
-                    flat = False
-                    self._debug_print(
-                        f" Break at i={i}, j={j}, y[{neighbor_index}]={y[neighbor_index]:.6f}, diff={diff:.6f}")
-                    break
+        # group window starts into runs, then extend each run by its last window
+        edges = numpy.diff(numpy.concatenate(([0], flat.view(numpy.int8), [0])))
+        run_starts = numpy.flatnonzero(edges == 1)
+        run_ends = numpy.flatnonzero(edges == -1) - 1 + (required_count - 1)
 
-            if flat:
-                self._debug_print(f"Found flat region starting at index {i}")
-                i = max(0, min(n - 1, floor(i + direction * required_count / 2)))
-                return i
+        # runs whose windows overlap merge into one region
+        answer = []
+        cumulative = numpy.concatenate(([0.0], numpy.cumsum(self._y_values)))
+        for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+            if answer and start <= answer[-1][1]:
+                start = answer[-1][0]
+                answer.pop()
+            level = (cumulative[end + 1] - cumulative[start]) / (end + 1 - start)
+            answer.append((start, end, float(level)))
 
-            i += direction
+        self._debug_print(f"Found {len(answer)} flat regions")
+        return answer
 
-        self._debug_print("No flat region found")
-        return None
+    def resample(self, offset, span, count, name=None):
+        """New Waveform on `count` evenly spaced points from `offset` over `span`, linearly interpolated."""
+        if self.count < 2:
+            raise ValueError("Waveform has no data")
+        x_new = offset + numpy.arange(count) * (span / (count - 1)) if count > 1 else numpy.full(count, float(offset))
+
+        wf = Waveform(self._name if name is None else name)
+        wf.set_y_values(numpy.interp(x_new, self._csv_x_values(), self._y_values))
+        wf.offset = offset
+        wf.span = span
+        wf.x_units = self._x_units
+        wf.y_units = self._y_units
+        return wf
+
+    def _grid_samples(self, origin, dx):
+        """Samples interpolated at origin + k*dx for every k inside this waveform's x-range, and the first k."""
+        first = int(ceil((self._offset - origin) / dx - 1e-9))
+        last = int(floor((self._offset + self._span - origin) / dx + 1e-9))
+        x_grid = origin + numpy.arange(first, last + 1) * dx
+        return numpy.interp(x_grid, self._csv_x_values(), self._y_values), first
+
+    @staticmethod
+    def find_delay(reference, other, dx=None, max_delay=None):
+        """
+        Time by which `other` lags `reference` (a feature at x in reference is at x + delay in other),
+        from the peak of their FFT cross-correlation, refined to a fraction of a sample by a parabola
+        through the peak.  Both are resampled to the finer of the two sample intervals (or `dx`) and
+        have their mean removed, so different offsets, spans, sample rates and DC levels are fine.
+        """
+        if reference.count < 2 or other.count < 2 or reference.span <= 0 or other.span <= 0:
+            raise ValueError("Waveforms need at least two samples and a positive span")
+        if dx is None:
+            dx = min(reference.span / (reference.count - 1), other.span / (other.count - 1))
+
+        origin = min(reference.offset, other.offset)
+        a, first_a = reference._grid_samples(origin, dx)
+        b, first_b = other._grid_samples(origin, dx)
+        a = a - a.mean()
+        b = b - b.mean()
+
+        size = a.size + b.size - 1
+        n = 1 << (size - 1).bit_length()
+        circular = numpy.fft.irfft(numpy.fft.rfft(a, n) * numpy.conj(numpy.fft.rfft(b, n)), n)
+        # correlation[k] = sum a[j + k] * b[j], for lags k = -(len(b) - 1) .. len(a) - 1
+        correlation = numpy.concatenate((circular[n - (b.size - 1):], circular[:a.size]))
+        lags = numpy.arange(-(b.size - 1), a.size)
+
+        # lag k means other's sample j lines up with reference's sample j + k
+        delays = (first_b - first_a - lags) * dx
+        if max_delay is not None:
+            correlation = numpy.where(numpy.abs(delays) <= max_delay, correlation, -numpy.inf)
+
+        peak = int(numpy.argmax(correlation))
+        if not numpy.isfinite(correlation[peak]):
+            return None
+
+        fraction = 0.0
+        if 0 < peak < correlation.size - 1 and numpy.isfinite(correlation[peak - 1]) and numpy.isfinite(correlation[peak + 1]):
+            left, center, right = correlation[peak - 1], correlation[peak], correlation[peak + 1]
+            curvature = left - 2.0 * center + right
+            if curvature < 0:
+                fraction = 0.5 * (left - right) / curvature
+
+        return float(delays[peak] - fraction * dx)
+
+    @staticmethod
+    def align(reference, other, dx=None, max_delay=None):
+        """
+        Align `other` to `reference` with find_delay(), returned as (reference, other, delay): both
+        resampled onto one grid over the x-range they share once `other` is shifted back by delay.
+        """
+        delay = Waveform.find_delay(reference, other, dx, max_delay)
+        if delay is None:
+            return None
+        if dx is None:
+            dx = min(reference.span / (reference.count - 1), other.span / (other.count - 1))
+
+        start = max(reference.offset, other.offset - delay)
+        end = min(reference.offset + reference.span, other.offset + other.span - delay)
+        if end <= start:
+            raise ValueError("Waveforms do not overlap once aligned")
+
+        count = int(floor((end - start) / dx + 1e-9)) + 1
+        span = (count - 1) * dx
+        shifted = Waveform(other.name)
+        shifted.set_y_values(other.y_values)
+        shifted.offset = other.offset - delay
+        shifted.span = other.span
+        shifted.x_units = other.x_units
+        shifted.y_units = other.y_units
+        return reference.resample(start, span, count), shifted.resample(start, span, count), delay
 
     def appy_gain(self, gain_value: float):
         self._progress_print(f"Applying gain of {gain_value:.3f}")
 
-        if self._y_values:
-            self._y_values = [y * gain_value for y in self._y_values]
-            self._debug_print(f"Applied gain={gain_value:.3f}, sample count={len(self._y_values)}")
+        if self.count > 0:
+            self._y_values = Waveform._read_only(self._y_values * gain_value)
+            self._debug_print(f"Applied gain={gain_value:.3f}, sample count={self.count}")
 
         return None
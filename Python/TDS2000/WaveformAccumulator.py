@@ -0,0 +1,153 @@
+import numpy
+
+from TDS2000.Waveform import Waveform
+
+
+class WaveformAccumulator:
+    """
+    Running statistics of repeated acquisitions of the same waveform: per-sample mean and variance
+    (Welford's method) plus min/max envelopes.  Waveforms are folded in one at a time into arrays
+    allocated on the first add, so memory does not grow with the number of acquisitions.
+
+    The first waveform added sets the sample count, x-axis and units; later ones must have the
+    same sample count.
+    """
+
+    def __init__(self, name="accumulated"):
+        self._name = name
+        self._n = 0
+        self._mean = None
+        self._m2 = None
+        self._min = None
+        self._max = None
+        self._offset = 0.0
+        self._span = 0.0
+        self._x_units = ""
+        self._y_units = ""
+        self._debug = False
+
+    @property
+    def debug(self):
+        return self._debug
+
+    @debug.setter
+    def debug(self, value: bool):
+        self._debug = bool(value)
+
+    def _debug_print(self, msg):
+        if self.debug:
+            print("[DEBUG]", msg)
+
+    @property
+    def count(self):
+        """Number of waveforms added."""
+        return self._n
+
+    @property
+    def sample_count(self):
+        return 0 if self._mean is None else self._mean.size
+
+    def clear(self):
+        """Forget all acquisitions; the arrays are reused when the next waveform has the same length."""
+        self._n = 0
+
+    def _start(self, size, template):
+        if self._mean is None or self._mean.size != size:
+            self._mean = numpy.zeros(size)
+            self._m2 = numpy.zeros(size)
+            self._min = numpy.empty(size)
+            self._max = numpy.empty(size)
+        self._mean[:] = 0.0
+        self._m2[:] = 0.0
+        self._min[:] = numpy.inf
+        self._max[:] = -numpy.inf
+        # copied by attribute, since scripts may load Waveform as a separate top-level module
+        self._offset = getattr(template, "offset", 0.0)
+        self._span = getattr(template, "span", 0.0)
+        self._x_units = getattr(template, "x_units", "")
+        self._y_units = getattr(template, "y_units", "")
+
+    def add(self, data):
+        """Fold in one Waveform (or array of samples)."""
+        values = numpy.asarray(getattr(data, "y_values", data), dtype=float).ravel()
+        if self._n == 0:
+            self._start(values.size, data)
+        elif values.size != self._mean.size:
+            raise ValueError(f"Expected {self._mean.size} samples, got {values.size}")
+
+        self._n += 1
+        delta = values - self._mean
+        self._mean += delta / self._n
+        # m2 += delta * (values - new mean)
+        self._m2 += delta * (values - self._mean)
+        numpy.minimum(self._min, values, out=self._min)
+        numpy.maximum(self._max, values, out=self._max)
+        return self
+
+    def add_many(self, data):
+        """Fold in a 2-D array with one acquisition per row, merged in one step (Chan et al.)."""
+        rows = numpy.asarray(data, dtype=float)
+        if rows.ndim != 2:
+            raise ValueError("add_many expects a 2-D array, one acquisition per row")
+        if rows.shape[0] == 0:
+            return self
+        if self._n == 0:
+            self._start(rows.shape[1], None)
+        elif rows.shape[1] != self._mean.size:
+            raise ValueError(f"Expected {self._mean.size} samples, got {rows.shape[1]}")
+
+        n_b = rows.shape[0]
+        mean_b = rows.mean(axis=0)
+        m2_b = ((rows - mean_b) ** 2).sum(axis=0)
+        total = self._n + n_b
+        delta = mean_b - self._mean
+        self._mean += delta * (n_b / total)
+        self._m2 += m2_b + delta ** 2 * (self._n * n_b / total)
+        self._n = total
+        numpy.minimum(self._min, rows.min(axis=0), out=self._min)
+        numpy.maximum(self._max, rows.max(axis=0), out=self._max)
+        self._debug_print(f"Accumulated {n_b} acquisitions, {self._n} in total")
+        return self
+
+    def _waveform(self, name, y_values):
+        wf = Waveform(name)
+        wf.set_y_values(y_values)
+        wf.offset = self._offset
+        wf.span = self._span
+        wf.x_units = self._x_units
+        wf.y_units = self._y_units
+        return wf
+
+    def _require(self, minimum=1):
+        if self._n < minimum:
+            raise ValueError(f"At least {minimum} waveform(s) must be added")
+
+    def mean(self):
+        """Average waveform."""
+        self._require()
+        return self._waveform(f"{self._name} mean", self._mean.copy())
+
+    def variance(self, ddof=1):
+        """Per-sample variance; ddof=1 (default) for the sample variance, 0 for the population."""
+        self._require(ddof + 1)
+        return self._waveform(f"{self._name} variance", self._m2 / (self._n - ddof))
+
+    def std(self, ddof=1):
+        """Per-sample standard deviation, i.e. noise (or vertical jitter) at each point."""
+        self._require(ddof + 1)
+        return self._waveform(f"{self._name} std", numpy.sqrt(self._m2 / (self._n - ddof)))
+
+    def minimum(self):
+        """Lower envelope."""
+        self._require()
+        return self._waveform(f"{self._name} min", self._min.copy())
+
+    def maximum(self):
+        """Upper envelope."""
+        self._require()
+        return self._waveform(f"{self._name} max", self._max.copy())
+
+    def peak_to_peak(self):
+        """Envelope height at each point."""
+        self._require()
+        return self._waveform(f"{self._name} p-p", self._max - self._min)
@@ -0,0 +1,174 @@
+import json
+import struct
+
+import numpy
+
+from TDS2000.Waveform import Waveform
+
+# File layout (little-endian):
+#   header   MAGIC, version (u32), waveform count (u32), index offset (u64)
+#   payload  raw float32/float64 samples of each waveform, each aligned to PAYLOAD_ALIGN
+#   index    UTF-8 JSON list, one entry per waveform: name, offset, span, x_units, y_units,
+#            message, dtype, count, data_offset
+MAGIC = b"BWWFARC\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+PAYLOAD_ALIGN = 64
+DTYPES = ("float32", "float64")
+
+
+class WaveformArchiveWriter:
+    """Writes many Waveforms into one binary archive file; use as a context manager or call close()."""
+
+    def __init__(self, file_name: str, dtype="float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}")
+        self._file_name = file_name
+        self._dtype = dtype
+        self._index = []
+        self._f = open(file_name, "wb")
+        self._f.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _align(self):
+        position = self._f.tell()
+        padding = (-position) % PAYLOAD_ALIGN
+        if padding:
+            self._f.write(b"\0" * padding)
+        return position + padding
+
+    def add(self, waveform: Waveform, message: str = "", dtype=None):
+        """Append one waveform; `dtype` overrides the archive default for this waveform."""
+        if self._f is None:
+            raise ValueError("Archive is closed")
+
+        dtype = self._dtype if dtype is None else dtype
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}")
+
+        data_offset = self._align()
+        payload = numpy.ascontiguousarray(waveform.y_values, dtype=numpy.dtype(dtype).newbyteorder("<"))
+        self._f.write(payload.tobytes())
+        self._index.append({
+            "name": waveform.name,
+            "offset": waveform.offset,
+            "span": waveform.span,
+            "x_units": waveform.x_units,
+            "y_units": waveform.y_units,
+            "message": str(message),
+            "dtype": dtype,
+            "count": waveform.count,
+            "data_offset": data_offset,
+        })
+        return len(self._index) - 1
+
+    def close(self):
+        if self._f is None:
+            return
+
+        try:
+            index_offset = self._f.tell()
+            self._f.write(json.dumps(self._index).encode("utf-8"))
+            self._f.seek(0)
+            self._f.write(HEADER.pack(MAGIC, VERSION, len(self._index), index_offset))
+        finally:
+            self._f.close()
+            self._f = None
+
+
+class WaveformArchiveReader:
+    """Memory-mapped reader for archives written by WaveformArchiveWriter."""
+
+    def __init__(self, file_name: str):
+        self._file_name = file_name
+        self._map = numpy.memmap(file_name, dtype=numpy.uint8, mode="r")
+
+        if self._map.size < HEADER.size:
+            raise ValueError(f"{file_name} is not a waveform archive")
+
+        magic, version, count, index_offset = HEADER.unpack(self._map[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a waveform archive")
+        if version > VERSION:
+            raise ValueError(f"{file_name} archive version {version} is not supported")
+
+        self._index = json.loads(self._map[index_offset:].tobytes().decode("utf-8"))
+        if len(self._index) != count:
+            raise ValueError(f"{file_name} archive index is incomplete")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, key):
+        return self.waveform(key)
+
+    def __iter__(self):
+        for index in range(len(self._index)):
+            yield self.waveform(index)
+
+    def close(self):
+        self._map = None
+
+    @property
+    def names(self):
+        return [entry["name"] for entry in self._index]
+
+    def _entry(self, key):
+        if isinstance(key, str):
+            for entry in self._index:
+                if entry["name"] == key:
+                    return entry
+            raise KeyError(key)
+        return self._index[key]
+
+    def info(self, key):
+        """Index entry (name, offset, span, units, message, dtype, count) without reading samples."""
+        return dict(self._entry(key))
+
+    def message(self, key):
+        return self._entry(key)["message"]
+
+    def y_values(self, key):
+        """Read-only samples straight from the memory map, in their stored precision."""
+        entry = self._entry(key)
+        dtype = numpy.dtype(entry["dtype"]).newbyteorder("<")
+        start = entry["data_offset"]
+        end = start + entry["count"] * dtype.itemsize
+        return self._map[start:end].view(dtype)
+
+    def waveform(self, key):
+        entry = self._entry(key)
+        wf = Waveform(entry["name"])
+        wf.set_y_values(self.y_values(key))
+        wf.offset = entry["offset"]
+        wf.span = entry["span"]
+        wf.x_units = entry["x_units"]
+        wf.y_units = entry["y_units"]
+        return wf
+
+
+def write_waveforms(file_name: str, waveforms, messages=None, dtype="float32"):
+    """Write a list of Waveforms (and optional per-waveform messages) into one archive file."""
+    with WaveformArchiveWriter(file_name, dtype) as writer:
+        for index, wf in enumerate(waveforms):
+            writer.add(wf, "" if messages is None else messages[index])
+
+
+def read_waveforms(file_name: str):
+    """Read every Waveform from an archive file, returned with their messages."""
+    with WaveformArchiveReader(file_name) as reader:
+        return [reader.waveform(index) for index in range(len(reader))], \
+            [reader.message(index) for index in range(len(reader))]
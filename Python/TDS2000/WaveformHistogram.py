@@ -0,0 +1,213 @@
+import numpy
+
+# automatic binning never holds more bins than this; neighbouring bins are merged instead
+MAX_BINS = 65536
+# vertical divisions on the scope screen, for a bin width from the channel scale
+SCREEN_DIVISIONS = 8
+
+
+class WaveformHistogram:
+    """
+    Binned histogram of waveform sample values, updated incrementally across acquisitions.
+
+    With `low`/`high` given the bins are fixed and samples outside the range are counted as
+    under/overflow.  Otherwise the range grows as data requires, starting from `bin_width`,
+    or `bins` across the screen for channel `scale` (y units per division), or `bins` across
+    the first data added.  Beyond MAX_BINS neighbouring bins are merged, doubling the width.
+    Only the bin counts are kept, never the samples.
+    """
+
+    def __init__(self, bins=256, low=None, high=None, bin_width=None, scale=None):
+        if bins < 1:
+            raise ValueError("bins must be at least 1")
+        if (low is None) != (high is None):
+            raise ValueError("low and high must be given together")
+        if low is not None and not high > low:
+            raise ValueError("high must be greater than low")
+
+        self._bins = int(bins)
+        self._fixed = low is not None
+        self._origin = None if low is None else float(low)
+        self._bin_width = None if low is None else (float(high) - float(low)) / self._bins
+        if bin_width is not None and not self._fixed:
+            self._bin_width = float(bin_width)
+        elif scale is not None and not self._fixed:
+            self._bin_width = abs(float(scale)) * SCREEN_DIVISIONS / self._bins
+        if self._bin_width is not None and not self._bin_width > 0:
+            raise ValueError("bin width must be positive")
+        self._counts = numpy.zeros(self._bins if self._fixed else 0, dtype=numpy.int64)
+        self._underflow = 0
+        self._overflow = 0
+        self._min = numpy.inf
+        self._max = -numpy.inf
+        self._debug = False
+
+    @property
+    def debug(self):
+        return self._debug
+
+    @debug.setter
+    def debug(self, value: bool):
+        self._debug = bool(value)
+
+    def _debug_print(self, msg):
+        if self.debug:
+            print("[DEBUG]", msg)
+
+    @property
+    def count(self):
+        """Number of samples added, including under/overflow."""
+        return int(self._counts.sum()) + self._underflow + self._overflow
+
+    @property
+    def counts(self):
+        return self._counts.copy()
+
+    @property
+    def bin_edges(self):
+        if self._bin_width is None or self._origin is None:
+            return numpy.empty(0)
+        return self._origin + numpy.arange(self._counts.size + 1) * self._bin_width
+
+    @property
+    def bin_centers(self):
+        edges = self.bin_edges
+        return (edges[:-1] + edges[1:]) / 2.0
+
+    @property
+    def minimum(self):
+        return None if self.count == 0 else float(self._min)
+
+    @property
+    def maximum(self):
+        return None if self.count == 0 else float(self._max)
+
+    def clear(self):
+        self._counts[:] = 0
+        if not self._fixed:
+            self._counts = numpy.zeros(0, dtype=numpy.int64)
+            self._origin = None
+        self._underflow = 0
+        self._overflow = 0
+        self._min = numpy.inf
+        self._max = -numpy.inf
+
+    def add(self, data):
+        """Fold in a Waveform or array of samples."""
+        values = numpy.asarray(getattr(data, "y_values", data), dtype=float).ravel()
+        values = values[numpy.isfinite(values)]
+        if values.size == 0:
+            return self
+
+        lo = float(values.min())
+        hi = float(values.max())
+        self._min = min(self._min, lo)
+        self._max = max(self._max, hi)
+
+        if not self._fixed:
+            self._grow(lo, hi)
+
+        index = numpy.floor((values - self._origin) / self._bin_width).astype(numpy.int64)
+        if self._fixed:
+            # the top edge belongs to the last bin
+            index[values == self._origin + self._bins * self._bin_width] = self._bins - 1
+            self._underflow += int(numpy.count_nonzero(index < 0))
+            self._overflow += int(numpy.count_nonzero(index >= self._bins))
+            index = index[(index >= 0) & (index < self._bins)]
+
+        self._counts += numpy.bincount(index, minlength=self._counts.size)
+        self._debug_print(f"Histogram added {values.size} samples, {self._counts.size} bins")
+        return self
+
+    def _grow(self, lo, hi):
+        if self._bin_width is None:
+            if hi > lo:
+                self._bin_width = (hi - lo) / self._bins
+            else:
+                # constant data says nothing about the scale; start fine, merging widens it later
+                self._bin_width = (abs(lo) if lo != 0.0 else 1.0) / (self._bins * 1024.0)
+
+        if self._origin is None:
+            # center the first value range within whole bins
+            self._origin = lo - self._bin_width / 2.0
+
+        below, above = self._extension(lo, hi)
+        while self._counts.size + below + above > MAX_BINS:
+            self._merge_pairs()
+            below, above = self._extension(lo, hi)
+
+        if below > 0 or above > 0:
+            self._counts = numpy.concatenate((numpy.zeros(below, dtype=numpy.int64), self._counts,
+                                              numpy.zeros(above, dtype=numpy.int64)))
+            self._origin -= below * self._bin_width
+
+    def _extension(self, lo, hi):
+        """Bins to add below and above the current range to cover [lo, hi]."""
+        below = int(numpy.ceil((self._origin - lo) / self._bin_width)) if lo < self._origin else 0
+        top = self._origin + self._counts.size * self._bin_width
+        above = int(numpy.floor((hi - top) / self._bin_width)) + 1 if hi >= top else 0
+        return below, above
+
+    def _merge_pairs(self):
+        counts = self._counts
+        if counts.size % 2:
+            counts = numpy.concatenate((counts, numpy.zeros(1, dtype=numpy.int64)))
+        self._counts = counts.reshape(-1, 2).sum(axis=1)
+        self._bin_width *= 2.0
+        self._debug_print(f"Histogram merged to {self._counts.size} bins of {self._bin_width:g}")
+
+    def mode(self, low=None, high=None):
+        """Center of the most populated bin, optionally only among bins centered within [low, high]."""
+        centers = self.bin_centers
+        if centers.size == 0:
+            return None
+
+        counts = self._counts
+        selected = numpy.ones(centers.size, dtype=bool)
+        if low is not None:
+            selected &= centers >= low
+        if high is not None:
+            selected &= centers <= high
+
+        if not numpy.any(counts[selected] > 0):
+            return None
+
+        index = numpy.flatnonzero(selected)[numpy.argmax(counts[selected])]
+        return float(centers[index])
+
+    def percentile(self, percent):
+        """Value below which `percent` of the in-range samples fall, interpolated within its bin."""
+        total = int(self._counts.sum())
+        if total == 0:
+            return None
+        if not 0.0 <= percent <= 100.0:
+            raise ValueError("percent must be between 0 and 100")
+
+        cumulative = numpy.concatenate(([0], numpy.cumsum(self._counts)))
+        target = total * percent / 100.0
+        index = int(numpy.searchsorted(cumulative, target, side="left"))
+        index = min(max(index, 1), self._counts.size)
+
+        below = cumulative[index - 1]
+        inside = self._counts[index - 1]
+        fraction = 0.0 if inside == 0 else (target - below) / inside
+        value = self._origin + (index - 1 + fraction) * self._bin_width
+        if not self._fixed:
+            value = min(max(value, self._min), self._max)
+        return float(value)
+
+    def mid_level(self):
+        """Halfway between the smallest and largest sample added."""
+        if self.count == 0:
+            return None
+        return float(0.5 * (self._min + self._max))
+
+    def base_level(self, mid_level=None):
+        """Most common level below the mid level (histogram method for pulse base)."""
+        mid = self.mid_level() if mid_level is None else mid_level
+        return None if mid is None else self.mode(high=mid)
+
+    def top_level(self, mid_level=None):
+        """Most common level above the mid level (histogram method for pulse top)."""
+        mid = self.mid_level() if mid_level is None else mid_level
+        return None if mid is None else self.mode(low=mid)
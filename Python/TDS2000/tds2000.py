@@ -6,9 +6,29 @@ import fcntl
 import select
 from fcntl import F_GETFL, F_SETFL
 
-from TDS2000.Helper import MEDIUM_PAUSE, LONG_PAUSE, VERY_LONG_PAUSE, SCOPE_AVERAGING
+import numpy
+
+from TDS2000.Helper import LONG_PAUSE, VERY_LONG_PAUSE, SCOPE_AVERAGING, SETTLE_POLL_PAUSE
 from Waveform import Waveform  # Ensure the Waveform class is available
 
+# WFMPRE? fields, in order, when the source has a waveform
+PREAMBLE_FIELDS = ("BYT_NR", "BIT_NR", "ENCDG", "BN_FMT", "BYT_OR", "NR_PT", "WFID", "PT_FMT",
+                   "XINCR", "PT_OFF", "XZERO", "XUNIT", "YMULT", "YZERO", "YOFF", "YUNIT")
+
+# writes with these headers leave the waveform preamble (scales, offsets) unchanged
+PREAMBLE_SAFE_HEADERS = ("DATA:", "WFMPRE:", "CURVE", "MEASU", "CURS", "TRIG", "HEAD", "*OPC", "*CLS",
+                         "ACQ:STATE", "ACQUIRE:STATE")
+
+# state shadow: these (canonical) headers clear the shadow, or are actions that are always sent
+SHADOW_RESET_HEADERS = ("*RST", "*RCL", "REC", "FAC", "AUT")
+SHADOW_ALWAYS_SEND = ("*", "AUT", "ACQ:STA", "SAV", "REC", "FAC", "HAR", "CAL")
+
+# linux usbtmc driver: _IOW('[', 10, __u32), I/O timeout in milliseconds
+USBTMC_IOCTL_SET_TIMEOUT = 0x40045B0A
+IO_TIMEOUT = 5.0
+FLUSH_TIMEOUT = 0.1
+
+
 class TDS2000:
     def __init__(self):
         self.scope_path = None
@@ -16,6 +36,11 @@ class TDS2000:
         self._debug = False
         self._timing = False
         self._progress = False
+        self._preamble_cache = {}
+        self._shadow = {}
+        self._shadowing = True
+        self._io_timeout = IO_TIMEOUT
+        self._rx = bytearray()
 
     @property
     def debug(self):
@@ -41,6 +66,29 @@ class TDS2000:
     def progress(self, value: bool):
         self._progress = bool(value)
 
+    @property
+    def shadowing(self):
+        """Skip writes that would set a setting to the value it was last written with."""
+        return self._shadowing
+
+    @shadowing.setter
+    def shadowing(self, value: bool):
+        self._shadowing = bool(value)
+        self.invalidate_state()
+
+    @property
+    def io_timeout(self):
+        """Seconds to wait for the scope to accept a command or answer a query."""
+        return self._io_timeout
+
+    @io_timeout.setter
+    def io_timeout(self, value: float):
+        if value <= 0:
+            raise ValueError("io_timeout must be positive")
+        self._io_timeout = float(value)
+        if self.fd is not None:
+            self._set_driver_timeout(self._io_timeout)
+
     def _debug_print(self, msg):
         if self.debug:
             print("[DEBUG]", msg)
@@ -54,6 +102,11 @@ class TDS2000:
         self._progress_print(f'Connecting to scope at "{self.scope_path}"')
         try:
             self.fd = os.open(self.scope_path, os.O_RDWR)
+            fcntl.fcntl(self.fd, F_SETFL, fcntl.fcntl(self.fd, F_GETFL) | os.O_NONBLOCK)
+            self._set_driver_timeout(self._io_timeout)
+            self._rx = bytearray()
+            self.invalidate_state()
+            self.invalidate_preamble()
             # time.sleep(0.2)
             # self.flush_input()
             self._progress_print("Connected to: "+self.query("*IDN?"))
@@ -73,16 +126,149 @@ class TDS2000:
             self._progress_print("Disconnecting from scope")
             os.close(self.fd)
             self.fd = None
+            self._rx = bytearray()
         return True
 
+    def _set_driver_timeout(self, seconds: float):
+        """usbtmc ignores O_NONBLOCK and blocks in read() up to its own timeout; keep that bounded too."""
+        try:
+            fcntl.ioctl(self.fd, USBTMC_IOCTL_SET_TIMEOUT, struct.pack("I", max(1, int(seconds * 1000))))
+        except OSError:
+            pass  # not a usbtmc device
+
+    def _write_all(self, data: bytes, timeout: float):
+        deadline = time.perf_counter() + timeout
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self.fd, view):]
+                continue
+            except BlockingIOError:
+                pass
+            except TimeoutError:
+                if time.perf_counter() >= deadline:
+                    raise
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not select.select([], [self.fd], [], remaining)[1]:
+                raise TimeoutError(f"Oscilloscope did not accept command within {timeout:.1f}s")
+
+    def _fill(self, deadline: float, readlen=4096) -> bool:
+        """Append whatever the scope has sent to the receive buffer; False when the deadline passed first."""
+        while True:
+            try:
+                chunk = os.read(self.fd, readlen)
+                if chunk:
+                    self._rx.extend(chunk)
+                    return True
+            except BlockingIOError:
+                pass
+            except TimeoutError:
+                # driver timed out waiting for the scope
+                if time.perf_counter() >= deadline:
+                    return False
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            select.select([self.fd], [], [], remaining)
+
+    def _read_exact(self, count: int, deadline: float) -> bytes:
+        while len(self._rx) < count:
+            if not self._fill(deadline, max(4096, count - len(self._rx))):
+                raise TimeoutError(f"Oscilloscope sent {len(self._rx)} of {count} bytes before timing out")
+        data = bytes(self._rx[:count])
+        del self._rx[:count]
+        return data
+
+    def _read_line(self, deadline: float, readlen=1024) -> str:
+        """One response message, up to its terminating newline."""
+        while True:
+            # a terminator left behind by a binary block is not a response
+            while self._rx[:1] in (b"\n", b"\r"):
+                del self._rx[:1]
+            end = self._rx.find(b"\n")
+            if end >= 0:
+                line = bytes(self._rx[:end])
+                del self._rx[:end + 1]
+                return line.decode(errors='ignore').strip()
+            if not self._fill(deadline, readlen):
+                if self._rx:
+                    # unterminated answer, use what arrived
+                    line = bytes(self._rx)
+                    self._rx = bytearray()
+                    return line.decode(errors='ignore').strip()
+                raise TimeoutError(f"Oscilloscope did not respond within {self._io_timeout:.1f}s")
+
+    def _read_block(self, deadline: float) -> bytes:
+        """IEEE 488.2 definite-length block: '#', digit count, byte count, then the bytes."""
+        while self._rx[:1] in (b"\n", b"\r"):
+            del self._rx[:1]
+        initial = self._read_exact(2, deadline)  # Read the '#' and the header length digit
+        if not initial.startswith(b'#'):
+            raise RuntimeError("Invalid block response header")
+
+        header_len = int(initial[1:2])
+        self._debug_print(f"Header length field: {header_len}")
+
+        num_bytes = int(self._read_exact(header_len, deadline).decode("ascii"))
+        self._debug_print(f"Number of waveform bytes: {num_bytes}")
+
+        data = self._read_exact(num_bytes, deadline)
+        if self._rx[:1] == b"\n":
+            del self._rx[:1]
+        return data
+
+    def invalidate_state(self):
+        """Forget shadowed settings, e.g. after front-panel changes, so the next writes are all sent."""
+        self._shadow = {}
+
+    @staticmethod
+    def _canonical_header(header: str) -> str:
+        """Same key for long and short forms: first 3 letters of each mnemonic, plus its digits."""
+        parts = []
+        for mnemonic in header.upper().split(":"):
+            letters = mnemonic.rstrip("0123456789")
+            parts.append(letters[:3] + mnemonic[len(letters):])
+        return ":".join(parts)
+
+    def _shadow_check(self, cmd: str) -> bool:
+        """Record a write in the state shadow; True when it repeats the last value and can be skipped."""
+        text = cmd.strip()
+        header, _, value = text.partition(" ")
+        value = value.strip()
+        canonical = TDS2000._canonical_header(header)
+
+        if canonical.startswith(SHADOW_RESET_HEADERS) or ";" in text:
+            self.invalidate_state()
+            return False
+
+        if header.endswith("?") or canonical.startswith(SHADOW_ALWAYS_SEND) or canonical == "TRI" or value == "":
+            return False
+
+        # spellings differ between long and short form, so only an identical header is skipped
+        previous = self._shadow.get(canonical)
+        self._shadow[canonical] = (header.upper(), value)
+        return previous == (header.upper(), value)
+
     def write(self, cmd):
         if self.fd is None:
             raise ConnectionError("Oscilloscope not connected.")
 
+        if self._shadowing and self._shadow_check(cmd):
+            self._debug_print(f"Unchanged, not writing: {cmd.strip()}")
+            return
+
         start_s = time.perf_counter()
 
         self._debug_print(f"Writing: {cmd.strip()}")
-        os.write(self.fd, cmd.encode())
+        try:
+            self._write_all(cmd.encode(), self._io_timeout)
+        except OSError:
+            self.invalidate_state()
+            raise
+
+        if self._preamble_cache and not cmd.strip().upper().startswith(PREAMBLE_SAFE_HEADERS):
+            self.invalidate_preamble()
 
         elapsed_s = (time.perf_counter() - start_s)
         if self.timing:
@@ -102,13 +288,13 @@ class TDS2000:
 
         clean_cmd = cmd.strip()
         self._debug_print(f"Querying: {clean_cmd}")
-        os.write(self.fd, (clean_cmd + "").encode())
+        self._write_all((clean_cmd + "").encode(), self._io_timeout)
 
         write_completed_s = (time.perf_counter() - start_s)
         start_s = time.perf_counter()
 
         time.sleep(delay)
-        response = os.read(self.fd, readlen).decode(errors='ignore').strip()
+        response = self._read_line(time.perf_counter() + self._io_timeout, readlen)
         respond_s = (time.perf_counter() - start_s)
         if self.timing:
             print(f"[TIMING] \"{clean_cmd}\" took {flush_s:.3f}s to flush, {write_completed_s:.3f}s to write query, {respond_s:.3f}s to respond")
@@ -116,16 +302,30 @@ class TDS2000:
         self._debug_print(f"Response: {response}")
         return response
 
+    def query_many(self, cmds, delay=0.0) -> list:
+        """Send several queries as one compound message and return their responses in order."""
+        cmds = [cmd.strip() for cmd in cmds]
+        # later headers restart from the root, not from the previous command's subsystem
+        compound = ";".join(cmd if index == 0 or cmd.startswith((":", "*")) else ":" + cmd
+                            for index, cmd in enumerate(cmds))
+        response = self.query(compound, delay, readlen=max(1024, 256 * len(cmds)))
+        answers = TDS2000._split_response(response)
+        if len(answers) != len(cmds):
+            raise RuntimeError(f"Expected {len(cmds)} responses, got {len(answers)}: {response}")
+        return answers
+
     def flush_input(self, max_attempts=1):
         # self._debug_print("Flushing input buffer")
         start_s = time.perf_counter()
+        self._rx = bytearray()
+        self._set_driver_timeout(FLUSH_TIMEOUT)
         try:
             for _ in range(max_attempts):
-                data = os.read(self.fd, 512)
-                if not data:
+                if not self._fill(time.perf_counter() + FLUSH_TIMEOUT, 512):
                     break
-        except (BlockingIOError, TimeoutError):
-            pass
+        finally:
+            self._rx = bytearray()
+            self._set_driver_timeout(self._io_timeout)
 
         flush_s = time.perf_counter() - start_s
         if self.timing:
@@ -151,8 +351,7 @@ class TDS2000:
         self.write("CURSOR:SELECT:SOURCE " + channel)
         self.write("CURSOR:TYPE TIME")
         self.write("CURSOR:SELECT BOTH")
-        center_sec = float(self.query("HORIZONTAL:POSITION?").strip())
-        scale_sec = float(self.query("HORIZONTAL:SCALE?").strip())
+        center_sec, scale_sec = [float(v) for v in self.query_many(("HORIZONTAL:POSITION?", "HORIZONTAL:SCALE?"))]
         full_width = 10.0 * scale_sec
         left_edge = center_sec - full_width / 2.0
         time1 = left_edge + pos1_pct * full_width
@@ -164,12 +363,100 @@ class TDS2000:
         self._progress_print("Reading voltage at cursor positions")
         self.write("CURSOR:TYPE TIME")
         self.write("CURSOR:SELECT BOTH")
-        v1_str = self.query("CURSOR:VBARS:HPOS1?").strip()
-        v2_str = self.query("CURSOR:VBARS:HPOS2?").strip()
+        v1_str, v2_str = self.query_many(("CURSOR:VBARS:HPOS1?", "CURSOR:VBARS:HPOS2?"))
         v1 = float(v1_str)
         v2 = float(v2_str)
         return v1, v2
 
+    def wait_operation_complete(self):
+        """Block until the scope has applied all pending settings (*OPC?)."""
+        return self.query("*OPC?").strip() == "1"
+
+    def get_acquisition_count(self) -> int:
+        return int(float(self.query("ACQUIRE:NUMACQ?")))
+
+    def freeze_acquisition(self) -> bool:
+        """Stop acquiring so every source holds the same record; returns whether it was running."""
+        running = self.query("ACQUIRE:STATE?").strip() not in ("0", "OFF", "STOP")
+        if running:
+            self.write("ACQUIRE:STATE STOP")
+            self.wait_operation_complete()
+        return running
+
+    def resume_acquisition(self, running=True):
+        """Restart acquiring after freeze_acquisition(), if it was running then."""
+        if running:
+            self.write("ACQUIRE:STATE RUN")
+
+    def wait_for_acquisitions(self, count=None, timeout=VERY_LONG_PAUSE) -> bool:
+        """
+        Wait until `count` new acquisitions have completed (default: the averaging count in AVERAGE
+        mode, else 2), so the displayed waveform and measurements reflect the current settings.
+        Returns False if `timeout` seconds pass first.
+        """
+        start_s = time.perf_counter()
+        self.wait_operation_complete()
+
+        if count is None:
+            count = 2
+            mode, averages = self.query_many(("ACQUIRE:MODE?", "ACQUIRE:NUMAVG?"))
+            if mode.upper().startswith("AVE"):
+                count = int(float(averages))
+
+        baseline = self.get_acquisition_count()
+        target = baseline + count
+        while True:
+            acquired = self.get_acquisition_count()
+            if acquired < baseline:
+                # counter restarted with the new settings
+                baseline = 0
+                target = count
+            if acquired >= target:
+                self._debug_print(f"{acquired} acquisitions after {time.perf_counter() - start_s:.3f}s")
+                return True
+            if time.perf_counter() - start_s >= timeout:
+                self._debug_print(f"Timed out with {acquired} of {target} acquisitions")
+                return False
+            time.sleep(SETTLE_POLL_PAUSE)
+
+    def wait_for_stable_measurements(self, queries, tolerance: float, timeout=LONG_PAUSE, consecutive=2):
+        """
+        Read measurement queries until `consecutive` reads agree within `tolerance` (absolute) and
+        return those values; after `timeout` seconds the last values read are returned.
+        """
+        start_s = time.perf_counter()
+        previous = None
+        agreeing = 0
+        while True:
+            values = [float(v) for v in self.query_many(queries)]
+            # the scope reports 9.9E37 for a measurement it cannot make
+            valid = all(abs(v) < 9.0e37 for v in values)
+            if valid and previous is not None and all(abs(v - p) <= tolerance for v, p in zip(values, previous)):
+                agreeing += 1
+            else:
+                agreeing = 0
+            if agreeing + 1 >= consecutive:
+                self._debug_print(f"Measurements settled after {time.perf_counter() - start_s:.3f}s: {values}")
+                return values
+            if time.perf_counter() - start_s >= timeout:
+                self._debug_print(f"Measurements not settled after {timeout}s: {values}")
+                return values
+            previous = values if valid else None
+            time.sleep(SETTLE_POLL_PAUSE)
+
+    def _settled_min_max(self, ch_scale: float):
+        """
+        Wait for fresh acquisitions at the current scale, then for MEAS1 (min) and MEAS2 (max) to
+        settle; both together take no longer than the fixed LONG_PAUSE this replaced.
+        """
+        start_s = time.perf_counter()
+        self.wait_for_acquisitions(2, timeout=LONG_PAUSE)
+        remaining = max(0.0, LONG_PAUSE - (time.perf_counter() - start_s))
+        # 1% of the 8-division screen is a few 8-bit codes, i.e. trace noise
+        vmin, vmax = self.wait_for_stable_measurements(("MEASUREMENT:MEAS1:VALUE?", "MEASUREMENT:MEAS2:VALUE?"),
+                                                       tolerance=0.01 * 8.0 * ch_scale, timeout=remaining)
+        return vmin, vmax
+
     def calc_fit_vpd(self,ch_vpp:float)->float:
         VOLTS_PER_DIVISION = [0.005, 0.010, 0.020, 0.050, 0.100, 0.200, 0.500, 1.000, 2.000, 5.000]
 
@@ -199,76 +486,171 @@ class TDS2000:
         #self._progress_print(f"return {scale}")
         return scale
 
-    def get_waveform_data(self, channel="CH1", name="no_name"):
-        self._progress_print(f"Acquiring waveform from {channel}")
-        if self.timing:
-            start = time.perf_counter()
+    def invalidate_preamble(self):
+        """Forget cached waveform preambles, e.g. after front-panel changes."""
+        self._preamble_cache = {}
+
+    @staticmethod
+    def _split_response(response: str) -> list:
+        """Split a compound response at ';', except inside quoted strings."""
+        fields = []
+        current = ""
+        quoted = False
+        for ch in response.strip():
+            if ch == '"':
+                quoted = not quoted
+            if ch == ";" and not quoted:
+                fields.append(current.strip())
+                current = ""
+            else:
+                current += ch
+        fields.append(current.strip())
+        return fields
+
+    @staticmethod
+    def _parse_preamble(response: str) -> dict:
+        """Split a WFMPRE? response into its named fields; quoted WFID may contain ';' or ','."""
+        fields = TDS2000._split_response(response)
+        if len(fields) != len(PREAMBLE_FIELDS):
+            return None
+        return dict(zip(PREAMBLE_FIELDS, fields))
+
+    def get_preamble(self, channel="CH1", width=1) -> dict:
+        """XINCR, XZERO, YMULT, YZERO and YOFF of the current DATA:SOURCE, cached until settings change."""
+        key = (channel.upper(), int(width))
+        cached = self._preamble_cache.get(key)
+        if cached is not None:
+            return cached
+
+        fields = TDS2000._parse_preamble(self.query("WFMPRE?"))
+        if fields is not None:
+            preamble = {name.lower(): float(fields[name]) for name in ("XINCR", "XZERO", "YMULT", "YZERO", "YOFF")}
+        else:
+            # older firmware or incomplete answer: fall back to one query per value
+            self._debug_print("WFMPRE? not parsed, querying values one at a time")
+            preamble = {name.lower(): float(self.query(f"WFMPRE:{name}?"))
+                        for name in ("XINCR", "XZERO", "YMULT", "YZERO", "YOFF")}
+
+        self._preamble_cache[key] = preamble
+        return preamble
 
+    def _select_source(self, channel, width):
         self.write(f"DATA:SOURCE {channel}")
         self.write("DATA:ENCdg RIBinary")  # Signed integer, MSB first
-        self.write("DATA:WIDTH 1")  # 1 byte per sample
-        self.write("WFMPRE:BYTE_NR 1")
+        self.write(f"DATA:WIDTH {width}")  # bytes per sample
+        self.write(f"WFMPRE:BYTE_NR {width}")
         # time.sleep(SHORT_PAUSE)
 
-        xincr = float(self.query("WFMPRE:XINCR?"))
-        xzero = float(self.query("WFMPRE:XZERO?"))
-        ymult = float(self.query("WFMPRE:YMULT?"))
-        yzero = float(self.query("WFMPRE:YZERO?"))
-        yoff = float(self.query("WFMPRE:YOFF?"))
+    def _read_curve(self) -> bytes:
+        """Send CURVE? and read its IEEE 488.2 definite-length block."""
+        self.write("CURVE?")
+        raw_data = self._read_block(time.perf_counter() + self._io_timeout)
+        self._debug_print(f"Actual bytes read: {len(raw_data)}")
+        return raw_data
 
-        self._debug_print(f"XINCR: {xincr}, XZERO: {xzero}")
-        self._debug_print(f"YMULT: {ymult}, YZERO: {yzero}, YOFF: {yoff}")
+    def _make_waveform(self, name, y_values, preamble):
+        count = y_values.size
+        wf = Waveform(name)
+        wf.progress = self.progress
+        wf.set_y_values(y_values)
+        wf.offset = preamble["xzero"] * 1e9
+        wf.span = (preamble["xincr"] * (count - 1))*1e9
+        wf.x_units = "ns"
+        wf.y_units = "mV"
 
-        self.write("CURVE?")
-        initial = os.read(self.fd, 2)  # Read the '#' and the header length digit
-        if not initial.startswith(b'#'):
-            raise RuntimeError("Invalid CURVE? response header")
+        if self.debug:
+            print(f"[DEBUG] Retrieved {count} samples over {wf.span * 1e6:.6f} "+wf.x_units)
+            print(f"[DEBUG] First 5 Y values: {[f'{y:.3f}' for y in wf.y_values[:5]]}")
+            print(f"[DEBUG] First 5 X values: {[f'{x:.6f}' for x in wf.generate_x_values()[:5]]}")
 
-        header_len = int(initial[1:2])
-        self._debug_print(f"Header length field: {header_len}")
+        return wf
 
-        header_rest = os.read(self.fd, header_len)
-        num_bytes = int(header_rest.decode("ascii"))
-        self._debug_print(f"Number of waveform bytes: {num_bytes}")
+    def get_waveform_data(self, channel="CH1", name="no_name", width=1):
+        """Acquire waveform from channel, 1 byte per sample or (width=2) 2 bytes for more resolution."""
+        self._progress_print(f"Acquiring waveform from {channel}")
+        if self.timing:
+            start = time.perf_counter()
 
-        # Read the waveform data in chunks until fully received
-        raw_data = bytearray()
-        while len(raw_data) < num_bytes:
-            chunk = os.read(self.fd, num_bytes - len(raw_data))
-            if not chunk:
-                raise RuntimeError("Unexpected end of data while reading waveform")
-            raw_data.extend(chunk)
+        if width not in (1, 2):
+            raise ValueError("width must be 1 or 2")
 
-        self._debug_print(f"Actual bytes read: {len(raw_data)}")
+        self._select_source(channel, width)
 
-        count = len(raw_data)
-        if count != num_bytes:
-            print(f"Warning: Expected {num_bytes} bytes, got {count} bytes")
-            # raise RuntimeError(f"Expected {num_bytes} bytes, got {count} bytes")
+        preamble = self.get_preamble(channel, width)
+        xincr = preamble["xincr"]
+        xzero = preamble["xzero"]
+        ymult = preamble["ymult"]
+        yzero = preamble["yzero"]
+        yoff = preamble["yoff"]
 
-        # Decode as signed 8-bit integers
-        y_raw = struct.unpack(f">{count}b", raw_data)
-        y_values = [((val - yoff) * ymult + yzero)*1000.0 for val in y_raw]
+        self._debug_print(f"XINCR: {xincr}, XZERO: {xzero}")
+        self._debug_print(f"YMULT: {ymult}, YZERO: {yzero}, YOFF: {yoff}")
 
-        wf = Waveform(name)
-        wf.progress = self.progress
-        wf.set_y_values(y_values)
-        wf.offset = xzero * 1e9
-        wf.span = (xincr * (count - 1))*1e9
-        wf.x_units = "ns"
-        wf.y_units = "mV"
+        raw_data = self._read_curve()
+
+        # Decode as signed big-endian integers and scale to mV
+        count = len(raw_data) // width
+        y_raw = numpy.frombuffer(raw_data, dtype=">i1" if width == 1 else ">i2", count=count)
+        y_values = ((y_raw - yoff) * ymult + yzero) * 1000.0
+
+        wf = self._make_waveform(name, y_values, preamble)
 
         if self.timing:
             elapsed = time.perf_counter() - start
             print(f"[TIMING] get_waveform_data took {elapsed:.3f} sec")
 
-        if self.debug:
-            print(f"[DEBUG] Retrieved {count} samples over {wf.span * 1e6:.6f} "+wf.x_units)
-            print(f"[DEBUG] First 5 Y values: {[f'{y:.3f}' for y in y_values[:5]]}")
-            print(f"[DEBUG] First 5 X values: {[f'{x:.6f}' for x in wf.generate_x_values()[:5]]}")
-
         return wf
 
+    def acquire_waveforms(self, channels=("CH1", "CH2", "MATH"), names=None, width=1, freeze=True) -> dict:
+        """
+        Acquire several sources in one pass, returned as a dict of Waveforms keyed by channel.
+        With `freeze` the acquisition is stopped while reading, so all sources come from the same
+        trigger; it is restarted afterwards if it was running.
+        """
+        self._progress_print(f"Acquiring waveforms from {', '.join(channels)}")
+        if self.timing:
+            start = time.perf_counter()
+
+        if width not in (1, 2):
+            raise ValueError("width must be 1 or 2")
+        if names is None:
+            names = channels
+        if len(names) != len(channels):
+            raise ValueError("names must match channels")
+
+        running = self.freeze_acquisition() if freeze else False
+
+        try:
+            preambles = []
+            blocks = []
+            for channel in channels:
+                self._select_source(channel, width)
+                preambles.append(self.get_preamble(channel, width))
+                blocks.append(self._read_curve())
+        finally:
+            self.resume_acquisition(running)
+
+        # decode all sources together when their record lengths agree (the usual case)
+        dtype = ">i1" if width == 1 else ">i2"
+        counts = [len(block) // width for block in blocks]
+        if len(set(counts)) == 1:
+            y_raw = numpy.frombuffer(b"".join(blocks), dtype=dtype).reshape(len(blocks), counts[0])
+            scale = numpy.array([[p["ymult"], p["yoff"], p["yzero"]] for p in preambles])
+            y_all = ((y_raw - scale[:, 1:2]) * scale[:, 0:1] + scale[:, 2:3]) * 1000.0
+        else:
+            y_all = [((numpy.frombuffer(block, dtype=dtype, count=count) - p["yoff"]) * p["ymult"] + p["yzero"]) * 1000.0
+                     for block, count, p in zip(blocks, counts, preambles)]
+
+        answer = {}
+        for index, channel in enumerate(channels):
+            answer[channel] = self._make_waveform(names[index], y_all[index], preambles[index])
+
+        if self.timing:
+            elapsed = time.perf_counter() - start
+            print(f"[TIMING] acquire_waveforms took {elapsed:.3f} sec")
+
+        return answer
+
 
     def set_trigger(self,channel:str, vhigh:float, vlow:float):
         self._progress_print(f"Executing set_trigger {channel}, vhigh={vhigh}, vlow={vlow}")
@@ -323,10 +705,8 @@ class TDS2000:
 
         self.write(f"{channel}:SCALE {ch_scale}")
         self.write(f"{channel}:POSITION {ch_position/ch_scale}")
-        time.sleep(LONG_PAUSE)
 
-        vmin = float(self.query("MEASUREMENT:MEAS1:VALUE?"))
-        vmax = float(self.query("MEASUREMENT:MEAS2:VALUE?"))
+        vmin, vmax = self._settled_min_max(ch_scale)
         vpp = abs(vmax - vmin)
         vmid = (vmin+vmax)/2.0
         self._debug_print(f"SX scale={ch_scale}, vmax={vmax}, vmin={vmin}, vmid={vmid}, vpp={vpp}, pos={ch_position}")
@@ -341,10 +721,8 @@ class TDS2000:
 
             ch_scale = SEARCH_VPD[step]
             self.write(f"{channel}:SCALE {ch_scale}")
-            time.sleep(LONG_PAUSE)
 
-            vmin = float(self.query("MEASUREMENT:MEAS1:VALUE?"))
-            vmax = float(self.query("MEASUREMENT:MEAS2:VALUE?"))
+            vmin, vmax = self._settled_min_max(ch_scale)
             vpp = abs(vmax - vmin)
             vmid = (vmin + vmax) / 2.0
 
@@ -361,7 +739,7 @@ class TDS2000:
         self._progress_print("Executing autoalign_on_pulse")
 
         self.set_horizontal_scale(pulse_length_time * pulse_count)
-        time.sleep(MEDIUM_PAUSE)
+        self.wait_operation_complete()
 
         self.write(f"TRIGGER:MAIN:MODE AUTO")
         self.write(f"TRIGGER:MAIN:TYPE EDGE")  # one-time?
@@ -386,14 +764,14 @@ class TDS2000:
             self.write("SELECT:CH2 ON")
             self.write(f"CH2:SCALE {ch_scale}")
             self.write(f"CH2:POSITION {ch_position/ch_scale}")
-            time.sleep(MEDIUM_PAUSE)
+            self.wait_operation_complete()
 
             self.write("SELECT:MATH ON")
             self.set_math(vhigh, vlow)
             self.set_trigger("CH1",vhigh,vlow)
-            time.sleep(MEDIUM_PAUSE)
+            self.wait_operation_complete()
         else:
-            self.write("TRIGGER:MAIN:EDGE:SOURCE {channel}")
+            self.write(f"TRIGGER:MAIN:EDGE:SOURCE {channel}")
             self.write(f"SELECT:{channel} ON")
             self.write(f"MEASUREMENT:MEAS1:SOURCE {channel}")
             self.write(f"MEASUREMENT:MEAS1:TYPE MINIMUM")
@@ -406,4 +784,4 @@ class TDS2000:
 
         self.write("ACQUIRE:MODE AVERAGE")
         self.write(f"ACQUIRE:NUMAVG {SCOPE_AVERAGING}")
-        time.sleep(VERY_LONG_PAUSE)
+        self.wait_for_acquisitions(SCOPE_AVERAGING, timeout=VERY_LONG_PAUSE)
@@ -0,0 +1,47 @@
+import os
+
+import numpy
+
+from TDS2000.SweepResults import SweepResultsStore
+
+
+def _row(n):
+    return {"LenW": n, "AmplSet": 100.0 * n, "Meas": 99.5 * n, "Good": True}
+
+
+def test_append_after_truncated_chunk(tmp_path):
+    file_name = str(tmp_path / "sweep_results.bwsr")
+    with SweepResultsStore(file_name, chunk_rows=1) as store:
+        store.append(_row(1))
+        store.append(_row(2))
+
+    # a run killed while writing its last chunk
+    size = os.path.getsize(file_name)
+    with open(file_name, "r+b") as f:
+        f.truncate(size - 5)
+    assert len(SweepResultsStore(file_name).load()) == 1
+
+    # the resumed run appends after it
+    with SweepResultsStore(file_name, chunk_rows=1) as store:
+        store.append(_row(3))
+
+    results = SweepResultsStore(file_name).load()
+    assert results["LenW"].tolist() == [1, 3]
+    assert numpy.allclose(results["Meas"], [99.5, 298.5])
+
+
+def test_read_resyncs_after_damaged_chunk(tmp_path):
+    file_name = str(tmp_path / "sweep_results.bwsr")
+    with SweepResultsStore(file_name, chunk_rows=1) as store:
+        store.append(_row(1))
+        first_chunk = os.path.getsize(file_name)
+        store.append(_row(2))
+
+    # a chunk cut inside its header with a later chunk after it, as left by older versions
+    # that appended after a crash
+    with open(file_name, "rb") as f:
+        data = f.read()
+    with open(file_name, "wb") as f:
+        f.write(data[:first_chunk + 12] + data[:first_chunk])
+
+    assert SweepResultsStore(file_name).load()["LenW"].tolist() == [1, 1]
@@ -71,6 +71,10 @@ class AutomationExtender(AutomationInterface):
 		"""Query array of bytes response from command (ending with '\n') from socket device."""
 		return self.Parent.QueryBinaryResponse(self.Prefix+command)
 
+	def QueryBinaryResponses(self, commands: list) -> list:
+		"""Send several binary queries (each ending with '\n') at once, then receive their responses in order."""
+		return self.Parent.QueryBinaryResponses([self.Prefix+command for command in commands])
+
 	def QueryBinaryResponse_float(self, command: str) -> list:
 		"""Query array of bytes response from command (ending with '\n') from socket device."""
 		return self.Parent.QueryBinaryResponse_float(self.Prefix+command)
@@ -65,6 +65,10 @@ class AutomationInterface():
 		"""Query array of bytes response from command (ending with '\n') from socket device."""
 		pass
 
+	def QueryBinaryResponses(self, commands: list) -> list:
+		"""Send several binary queries (each ending with '\n') at once, then receive their responses in order."""
+		pass
+
 	def QueryResponse_int(self, command: str) -> int:
 		"""Query integer response from command (ending with '\n') from socket device."""
 		pass
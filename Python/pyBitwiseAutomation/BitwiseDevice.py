@@ -82,6 +82,21 @@ class BitwiseDevice(SocketDevice):
 
         return response
 
+    # Override
+    def QueryBinaryResponses(self, commands: list) -> list:
+        """Pipelined binary queries from socket device, with one error status check for all of them."""
+
+        if len(commands) == 0:
+            return []
+
+        responses = super().QueryBinaryResponses(["stc;" + commands[0]] + list(commands[1:]))
+        statusResponse = super().QueryResponse("st?\n")
+
+        if statusResponse.casefold() != "[none]".casefold():
+            raise Exception("[" + statusResponse + "]")
+
+        return responses
+
     def SaveConfiguration(self, configuration: str = "[recent]"):
         """Restore configuration file and optionally pause while operation completes.
 
@@ -308,9 +323,28 @@ class BitwiseDevice(SocketDevice):
         finally:
             f.close()
 
+    def fileXferReceive(self, command: str) -> bytes:
+        """Method for Receive next buffer from device using Next or Resend command, returns buffer. """
+        super().SendCommand("File:Xfer:" + command + "\n")
+        headerBytes = super().ReceiveAll(12)
+
+        smagic = int.from_bytes(headerBytes[0:4], byteorder="little")
+        sbytes = int.from_bytes(headerBytes[4:8], byteorder="little")
+        ssum = int.from_bytes(headerBytes[8:12], byteorder="little")
+
+        if smagic != 0x12345678:
+            raise Exception("[Response_From_" + command + "_Command_Is_Invalid]")
+
+        xfer = super().ReceiveAll(sbytes) if sbytes > 0 else bytes(0)
+
+        if (sum(xfer) & 0xffffffff) != ssum:
+            return None
+
+        return xfer
+
     def ReceiveFileAs(self, sourceFilePath: str, localFilePath: str):
-        """Receive file from device.  Needs testing. """
-        # print("BitwiseDevice::SendFileAs src=[" + sourceFilePath + "], localdest=[" + localFilePath + "]")
+        """Receive file from device. """
+        # print("BitwiseDevice::ReceiveFileAs src=[" + sourceFilePath + "], localdest=[" + localFilePath + "]")
 
         if len(sourceFilePath) == 0:
             raise Exception("[Source_Filename_Is_Missing]")
@@ -331,117 +365,60 @@ class BitwiseDevice(SocketDevice):
             if buffer[n] == '"':
                 break
 
-        if buffer[0] != '"' or buffer[n] != '"':
+        if len(buffer) < 2 or buffer[0] != '"' or buffer[n] != '"':
             raise Exception("[Invalid_Response_From_Get_Command]")
 
-        sevenNumbers = re.split("[0-9]+", buffer[n + 1:])
+        sevenNumbers = re.findall("[0-9]+", buffer[n + 1:])
         if len(sevenNumbers) != 7:
             raise Exception("[Invalid_Response_Length_Date_Time]")
 
         length = int(sevenNumbers[0])
-        year = int(sevenNumbers[1])
-        month = int(sevenNumbers[2])
-        day = int(sevenNumbers[3])
-        hour = int(sevenNumbers[4])
-        minute = int(sevenNumbers[5])
-        second = int(sevenNumbers[6])
+        dt = datetime.datetime(int(sevenNumbers[1]), int(sevenNumbers[2]), int(sevenNumbers[3]),
+                               int(sevenNumbers[4]), int(sevenNumbers[5]), int(sevenNumbers[6]))
 
         f = open(localFilePath, "wb")
+        received = False
         try:
 
             totalTransferred = 0
             while totalTransferred < length:
-                super().SendCommand("File:Xfer:Next\n")
-                headerBytes = super().Receive(12)
-
-                if len(headerBytes) != 12:
-                    raise Exception("[No_Response_From_Next_Command]")
-
-                smagic = int.from_bytes(headerBytes[0:4], byteorder="little")
-                sbytes = int.from_bytes(headerBytes[4:8], byteorder="little")
-                ssum = int.from_bytes(headerBytes[8:12], byteorder="little")
-
-                if smagic != 0x12345678:
-                    raise Exception("[Response_From_Next_Command_Is_Invalid]")
-
-                if sbytes == 0:
-                    break
-
-                cnt = 0
-                xfer = bytes(sbytes)
-                while cnt < sbytes:
-                    transfer = super().Receive(sbytes - cnt)
-                    if len(transfer) == 0:
-                        raise Exception("[Binary_Xfer_Unsuccessful]")
-
-                    for i in range(len(transfer)):
-                        xfer[cnt + i] = transfer[i]
-                    cnt = cnt + len(transfer)
-
-                xsum = 0
-                for i in range(len(xfer)):
-                    xsum = xsum + xfer[i]
+                xfer = self.fileXferReceive("Next")
 
                 retry = 3
-                while xsum != ssum and retry > 0:
-                    super().SendCommand("File:Xfer:Resend\n")
-
-                    headerBytes = super().Receive(12)
-
-                    if len(headerBytes) != 12:
-                        raise Exception("[No_Response_From_ResendCommand]")
-
-                    smagic = int.from_bytes(headerBytes[0:4], byteorder="little")
-                    sbytes = int.from_bytes(headerBytes[4:8], byteorder="little")
-                    ssum = int.from_bytes(headerBytes[8:12], byteorder="little")
+                while xfer is None and retry > 0:
+                    xfer = self.fileXferReceive("Resend")
+                    retry = retry - 1
 
-                    if smagic != 0x12345678:
-                        raise Exception("[Response_From_Resend_Command_Is_Invalid]")
-
-                    cnt = 0
-                    xfer = bytes(sbytes)
-                    while cnt < sbytes:
-                        transfer = super().Receive(sbytes - cnt)
-                        if len(transfer) == 0:
-                            raise Exception("[Binary_Retry_Unsuccessful]")
-
-                        for i in range(len(transfer)):
-                            xfer[cnt + i] = transfer[i]
-                        cnt = cnt + len(transfer)
-
-                    xsum = 0
-                    for i in range(len(xfer)):
-                        xsum = xsum + xfer[i]
-
-                if retry == 0:
+                if xfer is None:
                     raise Exception("[Binary_Xfer_Retries_Failed]")
 
+                if len(xfer) == 0:
+                    break
+
                 f.write(xfer)
                 totalTransferred = totalTransferred + len(xfer)
 
-            self.SendCommand("File:Xfer:DoneGet\n")
-
-            f.close()
-            f = None
-
-            statbuf = os.stat(localFilePath)
-            timeinfo = time.localtime(statbuf.st_mtime)
-            timeinfo.tm_year = year  # careful - c/c++ is years since 1900, but python is all 4 digits
-            timeinfo.tm_mon = month  # careful - c/c++ is 0-11, but python is 1-12
-            timeinfo.tm_mday = day
-            timeinfo.tm_hour = hour
-            timeinfo.tm_min = minute
-            timeinfo.tm_sec = second
-
-            new_times = (time.mktime(timeinfo), time.mktime(timeinfo))
-            os.utime(localFilePath, new_times)
+            received = True
 
         except Exception as e:
             print("Problem receiving file: " + str(e))
+            raise e
+
+        finally:
+            f.close()
+
+            # always end the Get transfer, so the device is not left in it after a failure
+            try:
+                self.SendCommand("File:Xfer:DoneGet\n")
+            except Exception as e:
+                if received:
+                    raise e
+                print("Problem ending file transfer: " + str(e))
 
-            if f is not None:
-                f.close()
+            if not received:
+                os.unlink(localFilePath)
 
-            os.unlink(localFilePath)
+        new_time = time.mktime(dt.timetuple())
+        os.utime(localFilePath, (new_time, new_time))
 
 # EOF
@@ -0,0 +1,129 @@
+# BulkFetch.py
+# ================================================================================
+# BOOST SOFTWARE LICENSE
+#
+# Copyright 2020 BitWise Laboratories Inc.
+# Original Author.......Jim Waschura
+# Contact...............info@bitwiselabs.com
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# obtaining a copy of the software and accompanying documentation covered by
+# this license (the "Software") to use, reproduce, display, distribute,
+# execute, and transmit the Software, and to prepare derivative works of the
+# Software, and to permit third-parties to whom the Software is furnished to
+# do so, all subject to the following:
+#
+# The copyright notices in the Software and this entire statement, including
+# the above license grant, this restriction and the following disclaimer,
+# must be included in all copies of the Software, in whole or in part, and
+# all derivative works of the Software, unless such copies or derivative
+# works are solely in the form of machine-executable object code generated by
+# a source language processor.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE, TITLE AND NON-INFRINGEMENT. IN NO EVENT
+# SHALL THE COPYRIGHT HOLDERS OR ANYONE DISTRIBUTING THE SOFTWARE BE LIABLE
+# FOR ANY DAMAGES OR OTHER LIABILITY, WHETHER IN CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+# ================================================================================
+
+
+import os
+from pyBitwiseAutomation.BitwiseDevice import BitwiseDevice
+from pyBitwiseAutomation.SocketDevice import SocketDevice
+from pyBitwiseAutomation.ConnectionPool import ConnectionPool
+
+
+class BulkFetch():
+    """Bulk fetch class.  Fetch many device files concurrently over additional connections."""
+
+    def __init__(self, device: BitwiseDevice, connections: int = 4):
+        self.Pool = ConnectionPool(device, connections)
+        return None
+
+    def __enter__(self):
+        self.Pool.Open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Pool.Close()
+        return False
+
+    @staticmethod
+    def fetchOne(connection: BitwiseDevice, prefix: str, filePath: str) -> bytes:
+        """Fetch one file with error status check, e.g. prefix "File:" or "Patt:"."""
+        data = connection.QueryBinaryResponse("stc;" + prefix + "Fetch \"" + filePath + "\"\n")
+        statusResponse = SocketDevice.QueryResponse(connection, "st?\n")
+
+        if statusResponse.casefold() != "[none]".casefold():
+            raise Exception("[" + statusResponse + "]")
+
+        return data
+
+    def Fetch(self, filePaths: list, prefix: str = "File:") -> dict:
+        """Fetch files into memory.
+
+        Returns dictionary with "Fetched" of file path to bytes, and "Failed" of file path to error message.
+        """
+        answer = {"Fetched": {}, "Failed": {}}
+
+        for filePath, data, error in self.Pool.Map(lambda c, p: BulkFetch.fetchOne(c, prefix, p), filePaths):
+            if error is None:
+                answer["Fetched"][filePath] = data
+            else:
+                answer["Failed"][filePath] = error
+
+        return answer
+
+    @staticmethod
+    def localPaths(filePaths: list) -> dict:
+        """Local relative path of each remote file: its path below the folder all of them share."""
+        parts = [[part for part in filePath.replace("\\", "/").split("/") if part not in ("", ".", "..") and not part.endswith(":")]
+                 for filePath in filePaths]
+        folders = [p[:-1] for p in parts]
+        common = 0
+        if len(folders) > 0:
+            shortest = min(len(folder) for folder in folders)
+            while common < shortest and all(folder[common] == folders[0][common] for folder in folders):
+                common += 1
+        return {filePath: os.path.join(*p[common:]) if len(p) > common else "" for filePath, p in zip(filePaths, parts)}
+
+    def FetchToFolder(self, filePaths: list, localDir: str, prefix: str = "File:") -> dict:
+        """Fetch files and write each into local folder, keeping its path below the folder the remote files share.
+
+        Returns dictionary with "Fetched" of file path to local file path, and "Failed" of file path to error message.
+        """
+        os.makedirs(localDir, exist_ok=True)
+
+        answer = {"Fetched": {}, "Failed": {}}
+        localPaths = {}
+        claimed = set()
+        for filePath, relativePath in BulkFetch.localPaths(filePaths).items():
+            localPath = os.path.join(localDir, relativePath)
+            if relativePath == "":
+                answer["Failed"][filePath] = "[Invalid_File_Path]"
+            elif os.path.normcase(localPath) in claimed:
+                answer["Failed"][filePath] = "[Duplicate_Local_Path]"
+            else:
+                claimed.add(os.path.normcase(localPath))
+                localPaths[filePath] = localPath
+
+        def fetchAndWrite(connection: BitwiseDevice, filePath: str) -> str:
+            data = BulkFetch.fetchOne(connection, prefix, filePath)
+            localPath = localPaths[filePath]
+            os.makedirs(os.path.dirname(localPath), exist_ok=True)
+            with open(localPath, "wb") as f:
+                f.write(data)
+            return localPath
+
+        for filePath, localPath, error in self.Pool.Map(fetchAndWrite, list(localPaths.keys())):
+            if error is None:
+                answer["Fetched"][filePath] = localPath
+            else:
+                answer["Failed"][filePath] = error
+
+        return answer
+
+# EOF
@@ -0,0 +1,149 @@
+# ConnectionPool.py
+# ================================================================================
+# BOOST SOFTWARE LICENSE
+#
+# Copyright 2020 BitWise Laboratories Inc.
+# Original Author.......Jim Waschura
+# Contact...............info@bitwiselabs.com
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# obtaining a copy of the software and accompanying documentation covered by
+# this license (the "Software") to use, reproduce, display, distribute,
+# execute, and transmit the Software, and to prepare derivative works of the
+# Software, and to permit third-parties to whom the Software is furnished to
+# do so, all subject to the following:
+#
+# The copyright notices in the Software and this entire statement, including
+# the above license grant, this restriction and the following disclaimer,
+# must be included in all copies of the Software, in whole or in part, and
+# all derivative works of the Software, unless such copies or derivative
+# works are solely in the form of machine-executable object code generated by
+# a source language processor.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE, TITLE AND NON-INFRINGEMENT. IN NO EVENT
+# SHALL THE COPYRIGHT HOLDERS OR ANYONE DISTRIBUTING THE SOFTWARE BE LIABLE
+# FOR ANY DAMAGES OR OTHER LIABILITY, WHETHER IN CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+# ================================================================================
+
+
+import queue
+import threading
+from pyBitwiseAutomation.BitwiseDevice import BitwiseDevice
+
+
+class ConnectionPool():
+    """Connection pool class.  Additional connections to the same device for concurrent transfers."""
+
+    def __init__(self, device: BitwiseDevice, connections: int = 4):
+        """A pool of zero connections runs everything on the device's own connection."""
+        self.Device = device
+        self.Size = max(0, int(connections))
+        self.Connections = []
+        return None
+
+    def __del__(self):
+        self.Close()
+        return None
+
+    def __enter__(self):
+        self.Open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+        return False
+
+    def getIsOpen(self) -> bool:
+        return len(self.Connections) > 0
+
+    def Open(self):
+        """Open pool connections in parallel; connections that fail are left out of the pool."""
+        if self.getIsOpen():
+            return None
+
+        address = self.Device.getAddress()
+        lock = threading.Lock()
+
+        def opener():
+            connection = BitwiseDevice()
+            try:
+                connection.Connect(address)
+            except Exception as e:
+                print("ConnectionPool unable to connect: ", e)
+                return
+            with lock:
+                self.Connections.append(connection)
+
+        threads = [threading.Thread(target=opener) for _ in range(self.Size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if self.Device.getDebugging():
+            print("ConnectionPool::Open() " + str(len(self.Connections)) + "-of-" + str(self.Size) + " connected")
+
+        return None
+
+    def Close(self):
+        """Disconnect pool connections in parallel.  Each is a new socket when reopened, so none waits for teardown."""
+        threads = [threading.Thread(target=connection.Disconnect, args=(False,)) for connection in self.Connections]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.Connections = []
+        return None
+
+    def Map(self, function, items: list) -> list:
+        """Call function(connection, item) for every item, concurrently across the pool.
+
+        Returns list of (item, result, error) in the order of items, where error is
+        None on success, otherwise the exception message.
+        """
+        results = [None] * len(items)
+        if len(items) == 0:
+            return results
+
+        temporary = not self.getIsOpen() and len(items) > 1 and self.Size > 0
+        if temporary:
+            self.Open()
+
+        work = queue.Queue()
+        for n in range(len(items)):
+            work.put(n)
+
+        def run(connection):
+            while True:
+                try:
+                    n = work.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    results[n] = (items[n], function(connection, items[n]), None)
+                except Exception as e:
+                    results[n] = (items[n], None, str(e))
+
+        try:
+            threads = [threading.Thread(target=run, args=(connection,)) for connection in self.Connections]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            # anything left over (e.g. no pool connections) runs on the control connection
+            run(self.Device)
+
+        finally:
+            if temporary:
+                self.Close()
+
+        return results
+
+# EOF
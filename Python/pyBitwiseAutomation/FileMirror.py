@@ -0,0 +1,175 @@
+# FileMirror.py
+# ================================================================================
+# BOOST SOFTWARE LICENSE
+#
+# Copyright 2020 BitWise Laboratories Inc.
+# Original Author.......Jim Waschura
+# Contact...............info@bitwiselabs.com
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# obtaining a copy of the software and accompanying documentation covered by
+# this license (the "Software") to use, reproduce, display, distribute,
+# execute, and transmit the Software, and to prepare derivative works of the
+# Software, and to permit third-parties to whom the Software is furnished to
+# do so, all subject to the following:
+#
+# The copyright notices in the Software and this entire statement, including
+# the above license grant, this restriction and the following disclaimer,
+# must be included in all copies of the Software, in whole or in part, and
+# all derivative works of the Software, unless such copies or derivative
+# works are solely in the form of machine-executable object code generated by
+# a source language processor.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE, TITLE AND NON-INFRINGEMENT. IN NO EVENT
+# SHALL THE COPYRIGHT HOLDERS OR ANYONE DISTRIBUTING THE SOFTWARE BE LIABLE
+# FOR ANY DAMAGES OR OTHER LIABILITY, WHETHER IN CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+# ================================================================================
+
+
+import json
+import os
+from pyBitwiseAutomation.BitwiseDevice import BitwiseDevice
+from pyBitwiseAutomation.ConnectionPool import ConnectionPool
+
+
+class FileMirror():
+    """File mirror class.  Incremental device-to-local folder synchronization."""
+
+    ManifestName = ".mirror_manifest.json"
+
+    def __init__(self, device: BitwiseDevice, maxTransfers: int = 4):
+        self.Device = device
+        self.MaxTransfers = max(1, int(maxTransfers))
+        return None
+
+    def getDebugging(self) -> bool:
+        return self.Device.getDebugging()
+
+    @staticmethod
+    def parseList(listing: str) -> tuple:
+        """Split File:List response (one name per line, folders end with '/') into file and folder names."""
+        files = []
+        folders = []
+        for line in listing.splitlines():
+            name = line.strip()
+            if len(name) > 1 and name[0] == '"' and name[-1] == '"':
+                name = name[1:-1]
+
+            if name == "" or name in (".", "..", "./", "../"):
+                continue
+
+            if name.endswith("/"):
+                folders.append(name[:-1])
+            else:
+                files.append(name)
+
+        return files, folders
+
+    @staticmethod
+    def joinRemote(folder: str, name: str) -> str:
+        if folder == "" or folder.endswith("/"):
+            return folder + name
+        return folder + "/" + name
+
+    def listRemote(self, remoteDir: str, recursive: bool, relative: str = "") -> list:
+        """List (remote path, relative path) pairs of all files in device folder."""
+        files, folders = FileMirror.parseList(self.Device.File.List(remoteDir))
+
+        answer = [(FileMirror.joinRemote(remoteDir, name), FileMirror.joinRemote(relative, name)) for name in files]
+
+        if recursive:
+            for name in folders:
+                answer += self.listRemote(FileMirror.joinRemote(remoteDir, name), True,
+                                          FileMirror.joinRemote(relative, name))
+
+        return answer
+
+    @staticmethod
+    def loadManifest(localDir: str) -> dict:
+        path = os.path.join(localDir, FileMirror.ManifestName)
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print("Problem reading mirror manifest, starting over: ", e)
+            return {}
+
+    @staticmethod
+    def saveManifest(localDir: str, manifest: dict):
+        path = os.path.join(localDir, FileMirror.ManifestName)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+        return None
+
+    def Sync(self, remoteDir: str, localDir: str, recursive: bool = True) -> dict:
+        """Mirror device folder into local folder, transferring only new or changed files.
+
+        Returns dictionary with lists "Fetched" and "Skipped" of relative paths,
+        and dictionary "Failed" of relative path to error message.
+        """
+
+        os.makedirs(localDir, exist_ok=True)
+        manifest = FileMirror.loadManifest(localDir)
+
+        result = {"Fetched": [], "Skipped": [], "Failed": {}}
+        pending = []
+        current = {}
+
+        for remotePath, relPath in self.listRemote(remoteDir, recursive):
+            localPath = os.path.join(localDir, *relPath.split("/"))
+            length = self.Device.File.Length(remotePath)
+            entry = manifest.get(relPath)
+
+            if entry is not None and entry.get("Length") == length and \
+                    os.path.exists(localPath) and os.path.getsize(localPath) == length:
+                checksum = self.Device.File.Checksum(remotePath)
+                if checksum == entry.get("Checksum"):
+                    current[relPath] = entry
+                    result["Skipped"].append(relPath)
+                    continue
+            else:
+                checksum = self.Device.File.Checksum(remotePath)
+
+            pending.append((remotePath, relPath, localPath, {"Length": length, "Checksum": checksum}))
+
+        if self.getDebugging():
+            print("FileMirror::Sync() " + str(len(pending)) + " to fetch, " + str(len(result["Skipped"])) + " unchanged")
+
+        for relPath, entry, error in self.fetchAll(pending):
+            if error is None:
+                current[relPath] = entry
+                result["Fetched"].append(relPath)
+            else:
+                result["Failed"][relPath] = error
+
+        FileMirror.saveManifest(localDir, current)
+        return result
+
+    @staticmethod
+    def fetchOne(device: BitwiseDevice, remotePath: str, localPath: str):
+        folder = os.path.dirname(localPath)
+        if folder != "":
+            os.makedirs(folder, exist_ok=True)
+
+        device.ReceiveFileAs(remotePath, localPath + ".part")
+        os.replace(localPath + ".part", localPath)
+        return None
+
+    def fetchAll(self, pending: list) -> list:
+        """Transfer pending files, using additional connections when more than one is pending."""
+        pool = ConnectionPool(self.Device, min(self.MaxTransfers, len(pending)) if self.MaxTransfers > 1 else 0)
+
+        def fetch(device: BitwiseDevice, itm: tuple):
+            FileMirror.fetchOne(device, itm[0], itm[2])
+
+        return [(itm[1], itm[3], error) for itm, result, error in pool.Map(fetch, pending)]
+
+# EOF
@@ -48,6 +48,7 @@ class SocketDevice(AutomationInterface):
         self.Sock = None
         self.IsConnected = False
         self.Debugging = False
+        self.Address = ""
         return None
 
     def __del__(self):
@@ -71,6 +72,10 @@ class SocketDevice(AutomationInterface):
     def getIsConnected(self) -> bool:
         return self.IsConnected
 
+    def getAddress(self) -> str:
+        """Address string used for most recent connection, e.g. for opening additional connections."""
+        return self.Address
+
     def Connect(self, ipaddress: str, dflt_port: int = 923):
         """Connect to socket device."""
         if self.IsConnected:
@@ -92,6 +97,7 @@ class SocketDevice(AutomationInterface):
         try:
             self.Sock.connect((tempBuffer, tempPort))
             self.IsConnected = True
+            self.Address = tempBuffer + ":" + str(tempPort)
         except Exception as e:
             print("self.Sock.connect() exception is: ", e)
             self.Sock = None
@@ -99,13 +105,14 @@ class SocketDevice(AutomationInterface):
 
         return None
 
-    def Disconnect(self):
-        """Disconnect from socket device."""
+    def Disconnect(self, waitForTeardown: bool = True):
+        """Disconnect from socket device.  Extra connections that will not be reopened may skip the teardown wait."""
         if self.IsConnected:
             self.Sock.shutdown(socket.SHUT_RDWR)
             self.Sock.close()
             self.IsConnected = False
-            time.sleep(3.0)  # ensure connection is torn-down completely before resuming
+            if waitForTeardown:
+                time.sleep(3.0)  # ensure connection is torn-down completely before resuming
         self.Sock = None
         return None
 
@@ -115,6 +122,20 @@ class SocketDevice(AutomationInterface):
             raise Exception("[Not_Connected]")
         return self.Sock.recv(buflen)
 
+    def ReceiveAll(self, buflen: int) -> bytes:
+        """Receive exactly the specified number of bytes from socket device."""
+        if not self.IsConnected:
+            raise Exception("[Not_Connected]")
+
+        return_value = bytearray()
+        while len(return_value) < buflen:
+            portion = self.Sock.recv(buflen - len(return_value))
+            if len(portion) == 0:
+                raise Exception("[Error_Receiving_Buffer]")
+            return_value += portion
+
+        return bytes(return_value)
+
     def Send(self, buffer: bytes):
         """Send specified number of bytes to socket device."""
         if not isinstance(buffer, bytes):
@@ -257,6 +278,27 @@ class SocketDevice(AutomationInterface):
 
         return return_value
 
+    def QueryBinaryResponses(self, commands: list) -> list:
+        """Send several binary queries (each ending with '\n') at once, then receive their responses in order."""
+
+        if not all(isinstance(command, str) for command in commands):
+            raise Exception("[Invalid_Command_Type]")
+
+        if not self.IsConnected:
+            raise Exception("[Not_Connected]")
+
+        if self.Debugging:
+            print("QueryBinaryResponses() commands: " + "".join(commands))
+
+        self.Sock.sendall(bytes("".join(commands), 'utf-8'))
+
+        return_value = []
+        for _ in commands:
+            count = int.from_bytes(self.ReceiveAll(4), byteorder="little")
+            return_value.append(self.ReceiveAll(count) if count > 0 else bytes(0))
+
+        return return_value
+
     def QueryBinaryResponse_float(self, command: str) -> list:
         """Query array of floats response from command (ending with '\n') from socket device."""
         data = self.QueryBinaryResponse(command)
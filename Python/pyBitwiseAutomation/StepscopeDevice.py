@@ -29,11 +29,125 @@
 # DEALINGS IN THE SOFTWARE.
 # ================================================================================
 
+import time
+
+import numpy
+
 from pyBitwiseAutomation.BitwiseDevice import *
 from pyBitwiseAutomation.autogenStepscope import *
 from pyBitwiseAutomation.autogenAccessory import *
 from pyBitwiseAutomation.autogenCommon import *
 
+
+def _getCoherentTraces(branch: AutomationExtender, names: tuple, traces, attempts: int) -> dict:
+    """Pipelined Binary<name>? queries of one branch, repeated until Sequence? is the same before and after."""
+    traces = tuple(traces)
+    if len(traces) == 0 or any(name not in names for name in traces):
+        raise Exception("[Invalid_Trace_Name]")
+
+    # settings for the axis are read outside the guard, which then spans only the trace queries
+    offsetGHz = branch.Cfg.getOffsetGHz()
+    spanGHz = branch.Cfg.getSpanGHz()
+    fftlength = branch.Cfg.getReclen()
+
+    for attempt in range(max(1, attempts)):
+        sequence = branch.getSequence()
+        responses = branch.QueryBinaryResponses(["Binary" + name + "?\n" for name in traces])
+
+        if branch.getSequence() == sequence:
+            answer = {}
+            for name, data in zip(traces, responses):
+                if not (len(data) % 4) == 0:
+                    raise Exception("[Binary_Float_Size_Invalid]")
+                answer[name] = numpy.frombuffer(data, dtype="<f4").astype(float)
+
+            count = max(len(values) for values in answer.values())
+            answer["FrequencyGHz"] = offsetGHz + numpy.arange(count) * (spanGHz / fftlength)
+            return answer
+
+        if branch.getDebugging():
+            print("Traces changed during fetch, attempt " + str(attempt + 1))
+
+    raise Exception("[Traces_Not_Coherent]")
+
+
+class StepscopeS11(BranchS11):
+    """S11 branch with trace fetching kept outside the generated code."""
+
+    TRACES = ("Magn", "Incident", "Reflected", "Phase")
+
+    def GetTraces(self, traces=("Magn", "Incident", "Reflected"), attempts: int = 3) -> dict:
+        """Fetch traces from one acquisition as numpy arrays keyed by name, with "FrequencyGHz" axis."""
+        return _getCoherentTraces(self, StepscopeS11.TRACES, traces, attempts)
+
+
+class StepscopeS21(BranchS21):
+    """S21 branch with trace fetching kept outside the generated code."""
+
+    TRACES = ("Magn", "Dut", "Through", "Phase")
+
+    def GetTraces(self, traces=("Magn", "Dut", "Through"), attempts: int = 3) -> dict:
+        """Fetch traces from one acquisition as numpy arrays keyed by name, with "FrequencyGHz" axis."""
+        return _getCoherentTraces(self, StepscopeS21.TRACES, traces, attempts)
+
+
+class StepscopeStep(BranchStep):
+    """Step branch with state polling and alignment methods kept outside the generated code."""
+
+    # state polls start fast so short operations are seen promptly, then back off
+    POLL_MIN_PAUSE = 0.02
+    POLL_MAX_PAUSE = 0.5
+
+    def WaitForState(self, condition, timeoutSec: float, label: str = "Waiting", error: str = None,
+                     required: bool = True) -> bool:
+        """Poll condition() with a growing pause until it returns True.
+
+        On timeout raise `error` (default "[Timeout_<label>]"), or return False if not `required`.
+        """
+
+        now = SocketDevice.timestamp()
+        begin_time = now
+        timeout = now + timeoutSec
+        pause = StepscopeStep.POLL_MIN_PAUSE
+
+        while not condition():
+            if now >= timeout:
+                if not required:
+                    return False
+                raise Exception(error if error is not None else "[Timeout_" + label.replace(" ", "_") + "]")
+
+            time.sleep(min(pause, timeout - now))
+            pause = min(pause * 2.0, StepscopeStep.POLL_MAX_PAUSE)
+            now = SocketDevice.timestamp()
+            if self.getDebugging():
+                print(label + " {:.1f}".format(now - begin_time))
+
+        return True
+
+    def WaitForAlignmentToComplete(self, timeoutSec: float = 15.0):
+        """Wait for alignment operation to complete. """
+
+        self.WaitForState(lambda: self.getRunning() == BranchStep.Running.Stop, timeoutSec, "Aligning",
+                          "[Timeout_During_Alignment]")
+        return None
+
+    def Align(self, mode: BranchStep.AlignMode, waitToComplete: bool = True, waitUntilAligningTimeout: float = 10.0,
+              waitToCompleteTimeout: float = 15.0):
+        """Method for Step Align."""
+
+        # an alignment that is over before the first poll still advances the run sequence
+        sequence = self.getSequence()
+        self.SendCommand("Align " + mode.value + "\n")
+
+        self.WaitForState(lambda: self.getRunning() != BranchStep.Running.Stop or self.getSequence() != sequence,
+                          waitUntilAligningTimeout, "Begin Aligning", "[Timeout_During_Alignment]")
+
+        if waitToComplete:
+            self.WaitForAlignmentToComplete(waitToCompleteTimeout)
+
+        return None
+
+
 class StepscopeDevice(BitwiseDevice):
     """Stepscope device class."""
 
@@ -43,9 +157,9 @@ class StepscopeDevice(BitwiseDevice):
         self.Acc = BranchAcc(self, "Acc:")
         self.Calib = BranchCalib(self, "Calib:")
         self.Pulse = BranchPulse(self, "Pulse:")
-        self.S11 = BranchS11(self, "S11:")
-        self.S21 = BranchS21(self, "S21:")
-        self.Step = BranchStep(self, "Step:")
+        self.S11 = StepscopeS11(self, "S11:")
+        self.S21 = StepscopeS21(self, "S21:")
+        self.Step = StepscopeStep(self, "Step:")
         self.Tdr = BranchTdr(self, "Tdr:")
         self.Tdt = BranchTdt(self, "Tdt:")
 
@@ -0,0 +1,138 @@
+# UploadCache.py
+# ================================================================================
+# BOOST SOFTWARE LICENSE
+#
+# Copyright 2020 BitWise Laboratories Inc.
+# Original Author.......Jim Waschura
+# Contact...............info@bitwiselabs.com
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# obtaining a copy of the software and accompanying documentation covered by
+# this license (the "Software") to use, reproduce, display, distribute,
+# execute, and transmit the Software, and to prepare derivative works of the
+# Software, and to permit third-parties to whom the Software is furnished to
+# do so, all subject to the following:
+#
+# The copyright notices in the Software and this entire statement, including
+# the above license grant, this restriction and the following disclaimer,
+# must be included in all copies of the Software, in whole or in part, and
+# all derivative works of the Software, unless such copies or derivative
+# works are solely in the form of machine-executable object code generated by
+# a source language processor.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE, TITLE AND NON-INFRINGEMENT. IN NO EVENT
+# SHALL THE COPYRIGHT HOLDERS OR ANYONE DISTRIBUTING THE SOFTWARE BE LIABLE
+# FOR ANY DAMAGES OR OTHER LIABILITY, WHETHER IN CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+# ================================================================================
+
+
+import hashlib
+import json
+import os
+from pyBitwiseAutomation.BitwiseDevice import BitwiseDevice
+
+
+class UploadCache():
+    """Upload cache class.  Skips sending files whose device copy already matches."""
+
+    def __init__(self, device: BitwiseDevice, indexFilePath: str = "", useChecksum: bool = True):
+        """Index is kept per device serial number; optionally persisted in a JSON index file."""
+        self.Device = device
+        self.IndexFilePath = indexFilePath
+        self.UseChecksum = useChecksum
+        self.SN = device.Const.getSN()
+        self.Index = {}
+        self.Digests = {}
+
+        if self.IndexFilePath != "" and os.path.exists(self.IndexFilePath):
+            try:
+                with open(self.IndexFilePath, "r") as f:
+                    self.Index = json.load(f)
+            except (OSError, ValueError) as e:
+                print("Problem reading upload index, starting over: ", e)
+                self.Index = {}
+
+        return None
+
+    def getDeviceIndex(self) -> dict:
+        """Entries for the connected device, keyed by destination path."""
+        return self.Index.setdefault(self.SN, {})
+
+    def localDigest(self, localfilepath: str) -> str:
+        """Content digest of local file, recomputed only when size or modification time changes."""
+        statbuf = os.stat(localfilepath)
+        key = os.path.abspath(localfilepath)
+        stamp = (statbuf.st_size, statbuf.st_mtime_ns)
+
+        cached = self.Digests.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(localfilepath, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+
+        self.Digests[key] = (stamp, digest.hexdigest())
+        return self.Digests[key][1]
+
+    def isCurrent(self, localfilepath: str, destinationfilepath: str) -> bool:
+        """True when the device copy was uploaded from identical content and still matches."""
+        entry = self.getDeviceIndex().get(destinationfilepath)
+        if entry is None or entry.get("Digest") != self.localDigest(localfilepath):
+            return False
+
+        try:
+            if self.UseChecksum and entry.get("Checksum") is not None:
+                return self.Device.File.Checksum(destinationfilepath) == entry["Checksum"]
+
+            return self.Device.File.Exists(destinationfilepath) and \
+                self.Device.File.Length(destinationfilepath) == entry.get("Length")
+
+        except Exception as e:
+            if self.Device.getDebugging():
+                print("UploadCache::isCurrent() " + destinationfilepath + ": " + str(e))
+            return False
+
+    def SendFileAs(self, localfilepath: str, destinationfilepath: str) -> bool:
+        """Send file to device unless device copy already matches.  Returns True when file was sent."""
+
+        if self.isCurrent(localfilepath, destinationfilepath):
+            if self.Device.getDebugging():
+                print("UploadCache::SendFileAs() skip " + destinationfilepath)
+            return False
+
+        self.Device.SendFileAs(localfilepath, destinationfilepath)
+
+        entry = {"Digest": self.localDigest(localfilepath), "Length": os.path.getsize(localfilepath)}
+        if self.UseChecksum:
+            entry["Checksum"] = self.Device.File.Checksum(destinationfilepath)
+
+        self.getDeviceIndex()[destinationfilepath] = entry
+        self.Save()
+        return True
+
+    def Forget(self, destinationfilepath: str = ""):
+        """Drop one destination (or all, when empty) from the connected device's index."""
+        if destinationfilepath == "":
+            self.Index[self.SN] = {}
+        else:
+            self.getDeviceIndex().pop(destinationfilepath, None)
+        self.Save()
+        return None
+
+    def Save(self):
+        """Write index file, when one is configured."""
+        if self.IndexFilePath == "":
+            return None
+
+        with open(self.IndexFilePath + ".tmp", "w") as f:
+            json.dump(self.Index, f, indent=1, sort_keys=True)
+        os.replace(self.IndexFilePath + ".tmp", self.IndexFilePath)
+        return None
+
+# EOF
@@ -10,5 +10,9 @@ from .BitwiseDevice import *
 from .PegaDevice import *
 from .PelaDevice import *
 from .StepscopeDevice import *
+from .FileMirror import *
+from .UploadCache import *
+from .ConnectionPool import *
+from .BulkFetch import *
 
 